@@ -0,0 +1,215 @@
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from solution import ProcessingConfig, ImageProcessor
+
+logger = logging.getLogger(__name__)
+
+MODES = {
+    'float': {},
+    'lut': {'engine': 'lut'},
+    'fused': {'engine': 'fused'},
+    'streaming': {'streaming': True},
+    'parallel': {'workers': os.cpu_count() or 1},
+}
+
+
+@dataclass
+class BenchmarkCase:
+    size_mp: float
+    use_float32: bool
+    mode: str
+    output_format: str = "png"
+
+    @property
+    def case_id(self) -> str:
+        dtype = 'float32' if self.use_float32 else 'float64'
+        return f"{self.size_mp:g}MP-{dtype}-{self.mode}-{self.output_format}"
+
+    def shape(self) -> tuple:
+        """Keep the default 1:10 aspect ratio of ProcessingConfig."""
+        height = max(1, round(math.sqrt(self.size_mp * 1e6 / 10)))
+        return height, max(1, round(self.size_mp * 1e6 / height))
+
+
+def _timed(stages: Dict[str, float], name: str, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    stages[name] = time.perf_counter() - started
+    return result
+
+
+def run_case(case: BenchmarkCase, workdir: str) -> dict:
+    """Run one case; meant to execute in a fresh process so peak RSS is its own."""
+    logging.disable(logging.WARNING)
+    height, width = case.shape()
+    config = ProcessingConfig(
+        width=width, height=height, use_float32=case.use_float32,
+        output_format=case.output_format, show_plot=False, trace_memory=False,
+        output_path=str(Path(workdir) / f"{case.case_id}.png"),
+        **MODES[case.mode]
+    )
+    processor = ImageProcessor(config)
+    stages: Dict[str, float] = {}
+
+    started = time.perf_counter()
+    if config.streaming:
+        result = _timed(stages, 'streaming', processor.process_streaming)
+    else:
+        data = _timed(stages, 'generate_synthetic_data', processor.generate_synthetic_data)
+        if case.mode == 'float':
+            log_data = _timed(stages, 'apply_log_transform',
+                              processor.apply_log_transform, data, processor.histogram)
+            scaled = _timed(stages, 'apply_conditional_scaling',
+                            processor.apply_conditional_scaling, log_data, processor.histogram)
+            result = _timed(stages, 'normalize_to_uint8',
+                            processor.normalize_to_uint8, scaled, processor.histogram)
+            del log_data, scaled
+        else:
+            result = _timed(stages, 'transform', processor.transform, data)
+    _timed(stages, 'create_visualization', processor.create_visualization, result)
+    wall_s = time.perf_counter() - started
+
+    try:
+        import resource
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        peak_rss_mb = None
+
+    return {
+        'case': case.case_id,
+        **asdict(case),
+        'shape': [height, width],
+        'stages_s': stages,
+        'wall_s': wall_s,
+        'peak_rss_mb': peak_rss_mb,
+        'throughput_mp_s': height * width / 1e6 / wall_s
+    }
+
+
+def run_suite(cases: List[BenchmarkCase]) -> dict:
+    context = multiprocessing.get_context('spawn')
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for case in cases:
+            logger.info(f"Running {case.case_id}...")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(run_case, case, workdir).result()
+            logger.info(f"  {result['wall_s']:.2f}s, {result['throughput_mp_s']:.1f} MP/s, "
+                       f"peak RSS {result['peak_rss_mb']} MB")
+            results.append(result)
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'cpu_count': os.cpu_count()
+        },
+        'results': results
+    }
+
+
+def find_regressions(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Cases whose wall time or peak RSS grew by more than ``tolerance`` (a fraction).
+
+    Cases under 50 ms or 1 MB in the baseline are skipped as noise.
+    """
+    previous = {result['case']: result for result in baseline.get('results', [])}
+    regressions = []
+    for result in current['results']:
+        reference = previous.get(result['case'])
+        if reference is None:
+            continue
+        for metric in ('wall_s', 'peak_rss_mb'):
+            floor = 0.05 if metric.endswith('_s') else 1.0
+            if result[metric] is None or reference.get(metric) is None or reference[metric] < floor:
+                continue
+            change = result[metric] / reference[metric] - 1
+            if change > tolerance:
+                regressions.append(f"{result['case']}: {metric} {reference[metric]:.2f} → "
+                                   f"{result[metric]:.2f} (+{change*100:.0f}%)")
+    return regressions
+
+
+def print_report(report: dict, regressions: Optional[List[str]]) -> None:
+    print("\n" + "="*72)
+    print("RASTER PIPELINE BENCHMARK")
+    print("="*72)
+    print(f"{'Case':<34} {'Wall (s)':>9} {'MP/s':>8} {'Peak RSS (MB)':>14}")
+    for result in report['results']:
+        rss = result['peak_rss_mb']
+        print(f"{result['case']:<34} {result['wall_s']:>9.2f} {result['throughput_mp_s']:>8.1f} "
+              f"{'n/a' if rss is None else f'{rss:.0f}':>14}")
+    if regressions is not None:
+        print(f"\nRegressions: {len(regressions)}")
+        for line in regressions:
+            print(f"  {line}")
+    print("="*72 + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the raster pipeline stages.")
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1, 10, 100],
+                        help="Raster sizes in megapixels (default: 1 10 100)")
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES),
+                        help="Execution modes to sweep")
+    parser.add_argument('--dtypes', nargs='+', default=['float32', 'float64'],
+                        choices=['float32', 'float64'], help="Working float widths")
+    parser.add_argument('--figure', action='store_true',
+                        help="Render the matplotlib figure instead of the direct PNG")
+    parser.add_argument('--output', type=Path, default=Path("benchmark_results.json"),
+                        help="Results file (default: benchmark_results.json)")
+    parser.add_argument('--baseline', type=Path,
+                        help="Stored results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed relative slowdown before flagging (default: 0.2)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Also write the results to --baseline")
+    args = parser.parse_args(argv)
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline requires --baseline")
+
+    cases = [
+        BenchmarkCase(size, dtype == 'float32', mode, "figure" if args.figure else "png")
+        for size in args.sizes
+        for dtype in args.dtypes
+        for mode in args.modes
+    ]
+    report = run_suite(cases)
+
+    regressions = None
+    if args.baseline and args.baseline.exists() and not args.save_baseline:
+        regressions = find_regressions(report, json.loads(args.baseline.read_text()),
+                                       args.tolerance)
+        report['regressions'] = regressions
+
+    args.output.write_text(json.dumps(report, indent=2))
+    logger.info(f"Results saved: {args.output}")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        logger.info(f"Baseline saved: {args.baseline}")
+
+    print_report(report, regressions)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,22 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from pathlib import Path
-from typing import Tuple, Optional
-from dataclasses import dataclass
+from typing import Callable, Tuple, Optional, List
+from dataclasses import dataclass, replace
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import argparse
+import functools
+import hashlib
 import logging
 import json
+import os
+import struct
+import time
+import tracemalloc
+import zlib
+import multiprocessing
+import queue
+import threading
 from datetime import datetime
 
 logging.basicConfig(
@@ -25,6 +37,23 @@ class ProcessingConfig:
     output_path: str = "processed_log_image.png"
     colormap: str = "gray"  
     use_float32: bool = True  
+    streaming: bool = False  # Process in row blocks instead of whole-array
+    block_memory_mb: float = 64.0  # Working-set budget per block in streaming mode
+    engine: str = "float"  # "float" (per-pixel math), "lut" (65,536-entry table) or "fused" (chunked in-place kernel)
+    workers: int = 1  # Tile-parallel execution when > 1
+    tile_size: int = 1024  # Edge length of square tiles for parallel execution
+    executor: str = "thread"  # "thread" or "process" pool for parallel execution
+    generator: str = "legacy"  # "legacy" (np.random.seed stream) or "seedsequence" (per-tile)
+    input_path: Optional[str] = None  # uint16 .npy or raw raster; synthetic data when unset
+    output_raster_path: Optional[str] = None  # uint8 .npy or raw result, written via memmap
+    output_format: str = "figure"  # "figure" (annotated matplotlib) or "png" (direct grayscale)
+    png_compression: int = 6  # zlib level 0-9 for direct PNG output
+    show_plot: bool = True  # Open an interactive window after rendering the figure
+    overview_levels: int = 0  # Number of 2×, 4×, 8×… overview levels to build (0 disables)
+    overview_method: str = "mean"  # "mean" (block average) or "decimate" (every n-th pixel)
+    cache_dir: Optional[str] = None  # Stage cache directory (disabled when unset)
+    cache_max_mb: float = 2048.0  # Size bound of the stage cache, evicted least recently used
+    trace_memory: bool = False  # Record per-stage allocations with tracemalloc (slows every stage)
     
     def __post_init__(self):
         if self.width <= 0 or self.height <= 0:
@@ -33,13 +62,741 @@ class ProcessingConfig:
             raise ValueError("Log threshold must be positive")
         if self.dpi <= 0:
             raise ValueError("DPI must be positive")
+        if self.block_memory_mb <= 0:
+            raise ValueError("Block memory budget must be positive")
+        if self.engine not in ("float", "lut", "fused"):
+            raise ValueError(f"Unknown engine '{self.engine}' "
+                             f"(expected 'float', 'lut' or 'fused')")
+        if self.workers < 1:
+            raise ValueError("Worker count must be at least 1")
+        if self.tile_size <= 0:
+            raise ValueError("Tile size must be positive")
+        if self.executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor '{self.executor}' (expected 'thread' or 'process')")
+        if self.output_format not in ("figure", "png"):
+            raise ValueError(f"Unknown output format '{self.output_format}' "
+                             f"(expected 'figure' or 'png')")
+        if not 0 <= self.png_compression <= 9:
+            raise ValueError("PNG compression level must be between 0 and 9")
+        if self.overview_levels < 0:
+            raise ValueError("Overview level count cannot be negative")
+        if self.overview_method not in ("mean", "decimate"):
+            raise ValueError(f"Unknown overview method '{self.overview_method}' "
+                             f"(expected 'mean' or 'decimate')")
+        if self.cache_max_mb <= 0:
+            raise ValueError("Cache size bound must be positive")
+        if self.generator not in ("legacy", "seedsequence"):
+            raise ValueError(f"Unknown generator '{self.generator}' "
+                             f"(expected 'legacy' or 'seedsequence')")
 
 
-class ImageProcessor:
+def open_raster(path: Path, height: int, width: int) -> np.ndarray:
+    """
+    Map a uint16 raster from disk without reading it into memory.
+    
+    ``.npy`` files carry their own shape and dtype; any other file is read
+    as raw little-endian uint16 of the given height and width.
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Input raster not found: {path}")
+    
+    if path.suffix == '.npy':
+        data = np.load(path, mmap_mode='r')
+        if data.dtype != np.uint16 or data.ndim != 2:
+            raise ValueError(f"Expected a 2-D uint16 array in {path}, "
+                             f"got {data.ndim}-D {data.dtype}")
+        return data
+    
+    expected = height * width * 2
+    actual = path.stat().st_size
+    if actual != expected:
+        raise ValueError(f"Raw raster {path} is {actual} bytes, "
+                         f"expected {expected} for {height}×{width} uint16")
+    return np.memmap(path, dtype='<u2', mode='r', shape=(height, width))
+
+
+def create_output_raster(path: Path, shape: Tuple[int, int]) -> np.ndarray:
+    """Create a writable uint8 memmap (``.npy`` with header, otherwise raw)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == '.npy':
+        return np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=shape)
+    return np.memmap(path, dtype=np.uint8, mode='w+', shape=shape)
+
+
+def _write_png_chunk(f, chunk_type: bytes, data: bytes) -> None:
+    f.write(struct.pack('>I', len(data)))
+    f.write(chunk_type)
+    f.write(data)
+    f.write(struct.pack('>I', zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+
+def write_grayscale_png(path: Path, img: np.ndarray, compression_level: int = 6,
+                        rows_per_chunk: int = 256) -> None:
+    """
+    Write a 2-D uint8 array as an 8-bit grayscale PNG.
+    
+    Rows are prefixed with filter type 0 and fed through one zlib stream a
+    band at a time, so only a band of rows is ever copied and the input may
+    be a memmap.
+    """
+    height, width = img.shape
+    compressor = zlib.compressobj(compression_level)
+    band = np.zeros((min(rows_per_chunk, height), width + 1), dtype=np.uint8)
+    
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        _write_png_chunk(f, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))
+        
+        for start in range(0, height, rows_per_chunk):
+            rows = min(rows_per_chunk, height - start)
+            band[:rows, 1:] = img[start:start + rows]
+            compressed = compressor.compress(band[:rows].tobytes())
+            if compressed:
+                _write_png_chunk(f, b'IDAT', compressed)
+        
+        _write_png_chunk(f, b'IDAT', compressor.flush())
+        _write_png_chunk(f, b'IEND', b'')
+
+
+def overview_path(base_path: Path, factor: int) -> Path:
+    """Location of the ``factor``× overview stored next to ``base_path``."""
+    return base_path.with_name(f"{base_path.stem}.ovr{factor}.npy")
+
+
+class OverviewBuilder:
+    """
+    Builds 2×, 4×, 8×… reduced copies of a uint8 raster from rows fed in order.
+    
+    Mean levels cascade: each level's integer block sums are summed in 2×2
+    blocks into the next one, so the whole pyramid costs about a third
+    more than its first level. Sums are uint32 up to 4096× and uint64
+    from 8192×, where a block of 255s no longer fits in 32 bits. Counts of edge blocks are tracked per row
+    and column, and each level is rounded from exact sums, as a direct
+    block mean of the full raster would be. Decimated levels pick every
+    n-th pixel. Every level is written into its own ``.npy`` memmap next
+    to the result. Streaming runs feed rows as blocks finish; the
+    full-array paths feed the finished result afterwards.
+    """
+    
+    def __init__(self, base_path: Path, shape: Tuple[int, int], levels: int,
+                 method: str = "mean"):
+        self.base_path = base_path
+        self.shape = shape
+        self.method = method
+        self.factors = [2 ** level for level in range(1, levels + 1)]
+        self.levels = {
+            factor: create_output_raster(
+                overview_path(base_path, factor),
+                (-(-shape[0] // factor), -(-shape[1] // factor))
+            )
+            for factor in self.factors
+        }
+        self._pending = {factor: None for factor in self.factors}  # (sums, row counts) awaiting a pair
+        self._level_rows = {factor: 0 for factor in self.factors}
+        self._col_counts = {}
+        col_counts = np.ones(shape[1], dtype=np.int64)
+        for factor in self.factors:
+            col_counts = np.add.reduceat(col_counts, np.arange(0, col_counts.size, 2))
+            self._col_counts[factor] = col_counts
+        self._next_row = 0
+    
+    def add_rows(self, rows: np.ndarray) -> None:
+        start = self._next_row
+        self._next_row += rows.shape[0]
+        
+        if self.method == "decimate":
+            for factor in self.factors:
+                first = (-start) % factor
+                picked = rows[first::factor, ::factor]
+                level_row = (start + first) // factor
+                self.levels[factor][level_row:level_row + picked.shape[0]] = picked
+            return
+        
+        final = self._next_row == self.shape[0]
+        sums, row_counts = rows, np.ones(rows.shape[0], dtype=np.int64)
+        for factor in self.factors:
+            pending = self._pending[factor]
+            if pending is not None:
+                sums = np.concatenate([pending[0], sums])
+                row_counts = np.concatenate([pending[1], row_counts])
+            
+            complete = sums.shape[0] if final else (sums.shape[0] // 2) * 2
+            self._pending[factor] = (sums[complete:].copy(), row_counts[complete:]) \
+                if complete < sums.shape[0] else None
+            if not complete:
+                return
+            sums, row_counts = self._reduce(factor, sums[:complete], row_counts[:complete])
+    
+    @staticmethod
+    def _pair_sums(values: np.ndarray, axis: int, dtype) -> np.ndarray:
+        """Sum neighbouring pairs along ``axis`` as ``dtype``; an odd last element stays alone."""
+        def part(array, index):
+            return array[(slice(None),) * axis + (index,)]
+        
+        length = values.shape[axis]
+        half = length // 2
+        shape = list(values.shape)
+        shape[axis] = half + length % 2
+        sums = np.empty(shape, dtype=dtype)
+        np.add(part(values, slice(0, 2 * half, 2)), part(values, slice(1, 2 * half, 2)),
+               out=part(sums, slice(0, half)), dtype=dtype)
+        if length % 2:
+            part(sums, slice(half, None))[...] = part(values, slice(length - 1, None))
+        return sums
+    
+    @staticmethod
+    def _sum_dtype(factor: int):
+        """uint32 while a full ``factor``×``factor`` block of 255s fits, uint64 beyond (13+ levels)."""
+        return np.uint32 if factor * factor * 255 < 2 ** 32 else np.uint64
+    
+    def _reduce(self, factor: int, sums: np.ndarray,
+                row_counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Sum 2×2 blocks of the previous level into ``factor`` and write its rounded means."""
+        dtype = self._sum_dtype(factor)
+        sums = self._pair_sums(self._pair_sums(sums, 0, dtype), 1, dtype)
+        row_counts = np.add.reduceat(row_counts, np.arange(0, row_counts.size, 2))
+        
+        level_row = self._level_rows[factor]
+        self._level_rows[factor] += sums.shape[0]
+        counts = np.outer(row_counts, self._col_counts[factor])
+        self.levels[factor][level_row:level_row + sums.shape[0]] = \
+            np.rint(sums / counts).astype(np.uint8)
+        return sums, row_counts
+    
+    def finish(self) -> list:
+        """Flush every level and describe the pyramid for the metadata JSON."""
+        if self._next_row != self.shape[0]:
+            raise ValueError(f"Overview builder received {self._next_row} of "
+                             f"{self.shape[0]} rows")
+        
+        described = []
+        for factor, level in self.levels.items():
+            level.flush()
+            described.append({
+                'factor': factor,
+                'shape': level.shape,
+                'path': str(overview_path(self.base_path, factor))
+            })
+        logger.info(f"Built {len(self.levels)} overview levels ({self.method})")
+        return described
+
+
+class OverviewPyramid:
+    """Read access to overview levels persisted next to a result."""
+    
+    def __init__(self, base_path: Path):
+        self.base_path = base_path
+        self.levels = {}
+        factor = 2
+        while overview_path(base_path, factor).exists():
+            self.levels[factor] = overview_path(base_path, factor)
+            factor *= 2
+    
+    @property
+    def factors(self) -> List[int]:
+        return sorted(self.levels)
+    
+    def read(self, factor: int, window: Optional[Tuple[slice, slice]] = None) -> np.ndarray:
+        """Memory-mapped view of a level, optionally restricted to a (rows, cols) window."""
+        if factor not in self.levels:
+            raise ValueError(f"No {factor}× overview for {self.base_path} "
+                             f"(available: {self.factors})")
+        level = np.load(self.levels[factor], mmap_mode='r')
+        return level if window is None else level[window]
+    
+    def best_factor(self, min_height: int, min_width: int) -> Optional[int]:
+        """Coarsest level that still has at least the requested size."""
+        best = None
+        for factor in self.factors:
+            height, width = np.load(self.levels[factor], mmap_mode='r').shape
+            if height >= min_height and width >= min_width:
+                best = factor
+        return best
+
+
+class SyntheticRasterStream:
+    """
+    Sequential row-block reader over the seeded synthetic raster.
+    
+    Reproduces exactly the values of ``np.random.randint(0, 65536, dtype=uint16)``
+    after ``np.random.seed(seed)``: the legacy generator fills uint16 arrays
+    with the low then high half of each 32-bit draw, so blocks of any size are
+    carved out of that same stream with a one-element carry between reads.
+    """
+    
+    def __init__(self, seed: int, width: int):
+        self.width = width
+        self._rng = np.random.RandomState(seed)
+        self._carry: Optional[np.uint16] = None
+    
+    def read_rows(self, rows: int) -> np.ndarray:
+        count = rows * self.width
+        out = np.empty(count, dtype=np.uint16)
+        pos = 0
+        
+        if self._carry is not None and count > 0:
+            out[0] = self._carry
+            self._carry = None
+            pos = 1
+        
+        needed = count - pos
+        if needed > 0:
+            words = self._rng.randint(0, 2**32, size=(needed + 1) // 2, dtype=np.uint32)
+            halves = words.view('<u2')
+            out[pos:] = halves[:needed]
+            if halves.size > needed:
+                self._carry = halves[-1]
+        
+        return out.reshape(rows, self.width)
+
+
+class TiledRasterGenerator:
+    """
+    Seeded synthetic raster built from independently seeded square tiles.
+    
+    Tile ``i`` (row-major over the tile grid) draws from a PCG64 generator
+    seeded with ``SeedSequence(seed, spawn_key=(i,))`` — the ``i``-th child
+    of ``SeedSequence(seed).spawn`` — so any tile can be produced on its own.
+    The raster depends only on seed, shape and tile size: not on worker
+    count, fill order or how a streaming consumer slices it.
+    
+    Full-range uint16 draws take the 64-bit PCG64 outputs 16 bits at a time,
+    low half first, so a streaming reader can jump to any row of a tile
+    with ``advance`` and draw only the rows it needs. The seeded generators
+    of the current row of tiles are kept, since seeding costs more than
+    rewinding.
+    """
+    
+    def __init__(self, seed: int, height: int, width: int, tile_size: int):
+        self.seed = seed
+        self.height = height
+        self.width = width
+        self.tile_size = tile_size
+        self.tile_cols = -(-width // tile_size)
+        self._seeded_row: Optional[int] = None
+        self._seeded: List[Tuple[np.random.PCG64, dict]] = []
+    
+    def _bit_generator(self, tile_row: int, tile_col: int) -> np.random.PCG64:
+        return np.random.PCG64(np.random.SeedSequence(
+            self.seed, spawn_key=(tile_row * self.tile_cols + tile_col,)))
+    
+    def _tile(self, tile_row: int, tile_col: int) -> np.ndarray:
+        size = self.tile_size
+        shape = (min(size, self.height - tile_row * size), min(size, self.width - tile_col * size))
+        rng = np.random.Generator(self._bit_generator(tile_row, tile_col))
+        return rng.integers(0, 65536, size=shape, dtype=np.uint16)
+    
+    def _tile_rows(self, tile_row: int, tile_col: int, start: int, stop: int) -> np.ndarray:
+        """Rows ``[start, stop)`` of a tile, identical to the same rows of ``_tile``."""
+        width = min(self.tile_size, self.width - tile_col * self.tile_size)
+        first, last = start * width, stop * width
+        if self._seeded_row != tile_row:
+            generators = [self._bit_generator(tile_row, col) for col in range(self.tile_cols)]
+            self._seeded = [(generator, generator.state) for generator in generators]
+            self._seeded_row = tile_row
+        bit_generator, seeded_state = self._seeded[tile_col]
+        bit_generator.state = seeded_state
+        bit_generator.advance(first // 4)
+        raw = bit_generator.random_raw(-(-last // 4) - first // 4)
+        halves = raw.astype('<u8', copy=False).view('<u2')
+        return halves[first % 4:first % 4 + last - first].reshape(stop - start, width)
+    
+    def _fill_tile(self, out: np.ndarray, tile_row: int, tile_col: int) -> None:
+        rows = slice(tile_row * self.tile_size, (tile_row + 1) * self.tile_size)
+        cols = slice(tile_col * self.tile_size, (tile_col + 1) * self.tile_size)
+        out[rows, cols] = self._tile(tile_row, tile_col)
+    
+    def fill(self, out: np.ndarray, workers: int = 1) -> np.ndarray:
+        """Fill a preallocated (height, width) buffer or memmap, tiles in parallel."""
+        tile_rows = -(-self.height // self.tile_size)
+        grid = [(row, col) for row in range(tile_rows) for col in range(self.tile_cols)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(self._fill_tile, out, row, col) for row, col in grid]:
+                future.result()
+        return out
+    
+    def read_rows(self, start: int, stop: int) -> np.ndarray:
+        """
+        Rows ``[start, stop)``, generated on demand from the covering tiles.
+        
+        Only the requested rows are drawn, one tile at a time, so besides
+        the result at most one tile's slice of those rows is held.
+        """
+        out = np.empty((stop - start, self.width), dtype=np.uint16)
+        row = start
+        while row < stop:
+            tile_row = row // self.tile_size
+            band_start = tile_row * self.tile_size
+            band_stop = min(band_start + self.tile_size, stop)
+            for tile_col in range(self.tile_cols):
+                cols = slice(tile_col * self.tile_size, (tile_col + 1) * self.tile_size)
+                out[row - start:band_stop - start, cols] = self._tile_rows(
+                    tile_row, tile_col, row - band_start, band_stop - band_start)
+            row = band_stop
+        return out
+
+
+class RasterHistogram:
+    """
+    Exact value histogram of a uint16 raster, one bin per code.
+    
+    Built in a single pass (per raster, or per tile and merged), it yields
+    min, max, mean, exact median, percentiles and zero counts without
+    sorting. Since the log and scaling stages map each code to a fixed
+    value, their statistics follow from per-code values weighted by the
+    bin counts, with no scans over the float arrays.
+    """
+    
+    BINS = 65536
+    
+    def __init__(self, counts: Optional[np.ndarray] = None):
+        if counts is None:
+            counts = np.zeros(self.BINS, dtype=np.int64)
+        self.counts = counts.astype(np.int64, copy=False)
+    
+    @classmethod
+    def from_array(cls, data: np.ndarray) -> 'RasterHistogram':
+        histogram = cls()
+        histogram.update(data)
+        return histogram
+    
+    # bincount widens its input to intp, so large blocks are counted in chunks.
+    CHUNK_ELEMENTS = 1 << 22
+    
+    def update(self, block: np.ndarray) -> None:
+        flat = block.reshape(-1)
+        for start in range(0, flat.size, self.CHUNK_ELEMENTS):
+            chunk = flat[start:start + self.CHUNK_ELEMENTS]
+            self.counts += np.bincount(chunk, minlength=self.BINS)
+    
+    def merge(self, other: 'RasterHistogram') -> 'RasterHistogram':
+        self.counts += other.counts
+        return self
+    
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+    
+    @property
+    def zeros(self) -> int:
+        return int(self.counts[0])
+    
+    @property
+    def min(self) -> int:
+        return int(np.flatnonzero(self.counts)[0])
+    
+    @property
+    def max(self) -> int:
+        return int(np.flatnonzero(self.counts)[-1])
+    
+    @property
+    def mean(self) -> float:
+        return float(np.dot(self.counts, np.arange(self.BINS, dtype=np.int64)) / self.total)
+    
+    def percentile(self, q: float) -> float:
+        """Percentile with NumPy's default linear interpolation."""
+        if not 0 <= q <= 100:
+            raise ValueError("Percentile must be in [0, 100]")
+        
+        cumulative = np.cumsum(self.counts)
+        position = (cumulative[-1] - 1) * q / 100
+        lower_rank = int(np.floor(position))
+        upper_rank = int(np.ceil(position))
+        lower, upper = np.searchsorted(cumulative, [lower_rank, upper_rank], side='right')
+        return float(lower + (upper - lower) * (position - lower_rank))
+    
+    @property
+    def median(self) -> float:
+        return self.percentile(50)
+    
+    def summary(self) -> dict:
+        return {
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'median': self.median,
+            'zeros': self.zeros
+        }
+    
+    def count_where(self, mask: np.ndarray) -> int:
+        """Number of pixels whose code is selected by a per-code boolean mask."""
+        return int(self.counts[mask].sum())
+    
+    def weighted_stats(self, values: np.ndarray) -> dict:
+        """
+        Statistics of a per-code mapping applied to the raster.
+        
+        ``values`` holds one float per code, NaN marking invalid codes. Min and
+        max keep the dtype of ``values`` so they compare exactly with arrays
+        produced by the same kernels.
+        """
+        valid = ~np.isnan(values)
+        present = valid & (self.counts > 0)
+        weights = self.counts[present]
+        valid_count = int(weights.sum())
+        
+        stats = {
+            'valid_count': valid_count,
+            'invalid_count': self.total - valid_count
+        }
+        if valid_count == 0:
+            stats.update(min=float('nan'), max=float('nan'), mean=float('nan'))
+            return stats
+        
+        present_values = values[present]
+        stats.update(
+            min=present_values.min(),
+            max=present_values.max(),
+            mean=float(np.dot(weights, present_values.astype(np.float64)) / valid_count)
+        )
+        return stats
+
+
+class FusedKernel:
+    """
+    Chunked log → threshold → scale → quantize with preallocated buffers.
+    
+    Each chunk is small enough to stay in cache and is processed entirely in
+    one float buffer and two masks via ``out=``/``where=`` ufunc calls, so no
+    full-size temporaries are created. The operations and their dtypes match
+    the float path step for step, so results are bit-identical. Instances
+    hold scratch buffers and must not be shared between threads.
+    """
+    
+    CHUNK_ELEMENTS = 1 << 14
     
     def __init__(self, config: ProcessingConfig):
         self.config = config
+        dtype = np.float32 if config.use_float32 else np.float64
+        self._values = np.empty(self.CHUNK_ELEMENTS, dtype=dtype)
+        self._valid = np.empty(self.CHUNK_ELEMENTS, dtype=bool)
+        self._mask = np.empty(self.CHUNK_ELEMENTS, dtype=bool)
+    
+    def run(self, data: np.ndarray, out: np.ndarray, min_val, max_val) -> np.ndarray:
+        """Quantize a 2-D uint16 block into ``out`` using a global range."""
+        height, width = data.shape
+        span = max_val - min_val
+        rows_per_chunk = max(1, self.CHUNK_ELEMENTS // width)
+        cols_per_chunk = min(width, self.CHUNK_ELEMENTS)
+        
+        for row in range(0, height, rows_per_chunk):
+            for col in range(0, width, cols_per_chunk):
+                source = data[row:row + rows_per_chunk, col:col + cols_per_chunk]
+                self._run_chunk(source, out[row:row + rows_per_chunk, col:col + cols_per_chunk],
+                                min_val, span)
+        return out
+    
+    def _run_chunk(self, source: np.ndarray, target: np.ndarray, min_val, span) -> None:
+        count = source.size
+        values = self._values[:count].reshape(source.shape)
+        valid = self._valid[:count].reshape(source.shape)
+        mask = self._mask[:count].reshape(source.shape)
+        
+        # 10·log10 where the input is positive; invalid pixels are tracked in
+        # ``valid`` instead of being written as NaN.
+        np.copyto(values, source, casting='unsafe')
+        np.greater(values, 0, out=valid)
+        np.log10(values, out=values, where=valid)
+        np.multiply(values, 10, out=values)
+        
+        # NaN never compares below the threshold, so ``valid`` is implied.
+        np.less(values, self.config.log_threshold, out=mask)
+        np.logical_and(mask, valid, out=mask)
+        np.multiply(values, self.config.log_multiplier, out=values, where=mask)
+        
+        np.subtract(values, min_val, out=values)
+        np.divide(values, span, out=values)
+        np.logical_not(valid, out=mask)
+        np.copyto(values, 0, where=mask)
+        np.multiply(values, 255, out=values)
+        np.copyto(target, values, casting='unsafe')
+
+
+class StageCache:
+    """
+    Content-addressed on-disk store for pipeline intermediates.
+    
+    Entries are ``.npy`` files named by a hash of the inputs that determine
+    them, so they load as memmaps and stale entries are never matched. Hits
+    refresh an entry's mtime; when the directory exceeds its size bound, the
+    least recently used entries are removed.
+    """
+    
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.events = {}
+        self.evict()
+    
+    @staticmethod
+    def key(stage: str, fields: dict) -> str:
+        payload = json.dumps({'stage': stage, **fields}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+    
+    def _path(self, stage: str, key: str) -> Path:
+        return self.directory / f"{stage}-{key}.npy"
+    
+    def load(self, stage: str, key: str) -> Optional[np.ndarray]:
+        path = self._path(stage, key)
+        if not path.exists():
+            self.events[stage] = 'miss'
+            logger.info(f"Cache miss: {stage}")
+            return None
+        
+        os.utime(path)
+        self.events[stage] = 'hit'
+        logger.info(f"Cache hit: {stage} ({path.name})")
+        return np.load(path, mmap_mode='r')
+    
+    def store(self, stage: str, key: str, array: np.ndarray) -> None:
+        if array.nbytes > self.max_bytes:
+            logger.warning(f"Not caching {stage}: {array.nbytes / 1024**2:.1f} MB "
+                           f"exceeds the cache bound")
+            return
+        
+        path = self._path(stage, key)
+        temporary = path.with_name(path.name + '.tmp')
+        with open(temporary, 'wb') as f:
+            np.save(f, array)
+        os.replace(temporary, path)
+        self.evict(keep=path)
+    
+    def evict(self, keep: Optional[Path] = None) -> None:
+        entries = sorted(self.directory.glob('*.npy'), key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            total -= entry.stat().st_size
+            entry.unlink()
+            logger.info(f"Cache evicted: {entry.name}")
+    
+    def summary(self) -> dict:
+        hits = sum(1 for event in self.events.values() if event == 'hit')
+        return {
+            'dir': str(self.directory),
+            'stages': dict(self.events),
+            'hits': hits,
+            'misses': len(self.events) - hits
+        }
+
+
+class StageInstrumentation:
+    """
+    Wall time, CPU time and traced memory for each stage of a processor.
+    
+    Memory figures come from tracemalloc, which sees NumPy buffers but not
+    memory-mapped pages or allocations made in pool processes. The tracer is
+    process-wide, so traced stages must not run on several threads at once.
+    Stages may nest: an enclosing stage's running peak is kept aside before
+    the tracer's peak is reset for the inner one.
+    """
+    
+    def __init__(self, trace_memory: bool = False,
+                 hook: Optional[Callable[[str, dict], None]] = None):
+        self.trace_memory = trace_memory
+        self.hook = hook
+        self.stages = {}
+        self.peak_bytes = 0
+        self._open: List[list] = []  # [traced bytes at start, running peak] per active stage
+    
+    def _start_tracer(self) -> bool:
+        if not self.trace_memory or tracemalloc.is_tracing():
+            return False
+        tracemalloc.start()
+        return True
+    
+    def _fold_peak(self) -> None:
+        """Carry the tracer's peak into the active stage and the overall peak."""
+        _, peak = tracemalloc.get_traced_memory()
+        self.peak_bytes = max(self.peak_bytes, peak)
+        if self._open:
+            self._open[-1][1] = max(self._open[-1][1], peak)
+    
+    @contextmanager
+    def session(self):
+        """Keep the tracer running across stages so their allocations add up."""
+        started = self._start_tracer()
+        try:
+            yield self
+        finally:
+            if started:
+                self._fold_peak()
+                tracemalloc.stop()
+    
+    @contextmanager
+    def stage(self, name: str, elements: int = 0):
+        started_tracer = self._start_tracer()
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            self._fold_peak()
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            self._open.append([current, current])
+        
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            yield
+        finally:
+            wall_s = time.perf_counter() - wall_started
+            record = {
+                'wall_s': wall_s,
+                'cpu_s': time.process_time() - cpu_started,
+                'elements': elements,
+                'throughput_mp_s': elements / 1e6 / wall_s if elements and wall_s > 0 else None
+            }
+            if tracing:
+                self._fold_peak()
+                start_bytes, peak = self._open.pop()
+                current, _ = tracemalloc.get_traced_memory()
+                record['allocated_mb'] = (current - start_bytes) / (1024**2)
+                record['peak_mb'] = (peak - start_bytes) / (1024**2)
+                if self._open:
+                    self._open[-1][1] = max(self._open[-1][1], peak)
+            if started_tracer:
+                tracemalloc.stop()
+            
+            self.stages[name] = record
+            if self.hook is not None:
+                self.hook(name, record)
+    
+    @property
+    def peak_mb(self) -> Optional[float]:
+        if not self.trace_memory:
+            return None
+        if tracemalloc.is_tracing():
+            self._fold_peak()
+        return self.peak_bytes / (1024**2)
+
+
+def instrumented(method):
+    """Record an ``ImageProcessor`` method as a stage named after it."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if args and isinstance(args[0], np.ndarray):
+            elements = args[0].size
+        else:
+            elements = self.config.width * self.config.height
+        with self.instrumentation.stage(method.__name__, elements):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class ImageProcessor:
+    
+    def __init__(self, config: ProcessingConfig,
+                 stage_hook: Optional[Callable[[str, dict], None]] = None):
+        self.config = config
         self.metadata = {}
+        self.histogram: Optional[RasterHistogram] = None
+        self.source: Optional[np.ndarray] = None
+        self.overviews: Optional[OverviewBuilder] = None
+        self.cache: Optional[StageCache] = None
+        self.instrumentation = StageInstrumentation(config.trace_memory, stage_hook)
     
     def estimate_memory_usage(self) -> dict:
         """Estimate memory requirements."""
@@ -54,103 +811,248 @@ class ImageProcessor:
             'dtype': 'float32' if self.config.use_float32 else 'float64'
         }
         
+        if self.config.engine == "fused" and not self.config.streaming:
+            kernel_mb = (FusedKernel.CHUNK_ELEMENTS * (bytes_per_element + 2)) / (1024**2)
+            estimates['working_array_mb'] = kernel_mb
+            estimates['peak_mb'] = (estimates['input_array_mb'] + estimates['output_array_mb']
+                                    + kernel_mb)
+        
+        if self.config.streaming:
+            block_rows = self._rows_per_block()
+            block_elements = block_rows * self.config.width
+            estimates['block_rows'] = block_rows
+            estimates['block_mb'] = (block_elements * self._block_bytes_per_pixel()) / (1024**2)
+            estimates['peak_mb'] = estimates['output_array_mb'] + estimates['block_mb']
+        
         logger.info(f"Estimated peak memory usage: {estimates['peak_mb']:.1f} MB")
         return estimates
     
+    def _block_bytes_per_pixel(self) -> int:
+        """Bytes held per pixel while a block is in flight (input, floats, masks)."""
+        # uint16 input; synthetic blocks also pass through the generator's raw draws
+        source = 2 if self.config.input_path else 2 + 2
+        # The histogram pass widens each block to intp for bincount
+        histogram = 8
+        if self.config.engine == "fused":
+            return source + histogram  # the kernel's buffers are chunk-sized
+        if self.config.engine == "lut":
+            return source + max(histogram, 8)  # the intp indices take() builds
+        bytes_per_element = 4 if self.config.use_float32 else 8
+        # Working array, np.where result, normalization temporaries
+        # (difference and nan_to_num), plus a few boolean masks.
+        return source + max(histogram, 4 * bytes_per_element + 4)
+    
+    def _rows_per_block(self) -> int:
+        budget = int(self.config.block_memory_mb * 1024**2)
+        row_bytes = self.config.width * self._block_bytes_per_pixel()
+        return max(1, min(self.config.height, budget // row_bytes))
+    
+    def _iter_row_blocks(self):
+        """Yield (start, stop, block) row blocks of the input raster."""
+        if self.source is not None:
+            read = lambda start, stop: np.asarray(self.source[start:stop])
+        elif self.config.generator == "seedsequence":
+            source = self._tiled_generator()
+            read = source.read_rows
+        else:
+            stream = SyntheticRasterStream(self.config.seed, self.config.width)
+            read = lambda start, stop: stream.read_rows(stop - start)
+        
+        block_rows = self._rows_per_block()
+        for start in range(0, self.config.height, block_rows):
+            stop = min(start + block_rows, self.config.height)
+            yield start, stop, read(start, stop)
+    
+    def _tiled_generator(self) -> TiledRasterGenerator:
+        return TiledRasterGenerator(self.config.seed, self.config.height,
+                                    self.config.width, self.config.tile_size)
+    
+    @instrumented
     def generate_synthetic_data(self) -> np.ndarray:
         logger.info(f"Generating synthetic data: {self.config.height}×{self.config.width}")
         
-        np.random.seed(self.config.seed)
+        if self.config.generator == "seedsequence":
+            data = np.empty((self.config.height, self.config.width), dtype=np.uint16)
+            self._tiled_generator().fill(data, workers=self.config.workers)
+        else:
+            np.random.seed(self.config.seed)
+            
+            data = np.random.randint(
+                0, 65536, 
+                size=(self.config.height, self.config.width), 
+                dtype=np.uint16
+            )
         
-        data = np.random.randint(
-            0, 65536, 
-            size=(self.config.height, self.config.width), 
-            dtype=np.uint16
-        )
+        if self.config.workers > 1:
+            self.histogram = ParallelTileExecutor(self.config).histogram(data)
+        else:
+            self.histogram = RasterHistogram.from_array(data)
+        self._record_original_stats(self.histogram)
         
-        self.metadata['original_stats'] = {
-            'min': int(data.min()),
-            'max': int(data.max()),
-            'mean': float(data.mean()),
-            'median': float(np.median(data)),
-            'zeros': int((data == 0).sum()),
-            'shape': data.shape
-        }
+        return data
+    
+    def open_input_raster(self) -> np.ndarray:
+        """Memory-map ``config.input_path``; a ``.npy`` file's shape overrides the config."""
+        path = Path(self.config.input_path)
+        data = open_raster(path, self.config.height, self.config.width)
         
-        logger.info(f"Generated data - min: {data.min()}, max: {data.max()}, "
-                   f"zeros: {(data == 0).sum()} ({(data == 0).sum()/data.size*100:.2f}%)")
+        if data.shape != (self.config.height, self.config.width):
+            logger.info(f"Using raster shape {data.shape[0]}×{data.shape[1]} from {path.name}")
+            self.config = replace(self.config, height=data.shape[0], width=data.shape[1])
         
+        self.source = data
+        self.metadata['input'] = {'path': str(path), 'shape': data.shape}
         return data
     
-    def apply_log_transform(self, data: np.ndarray) -> np.ndarray:
-        logger.info("Applying log10 transformation...")
+    @instrumented
+    def load_raster(self) -> np.ndarray:
+        """Open the input raster from disk and record its statistics."""
+        logger.info(f"Loading raster: {self.config.input_path}")
+        data = self.source if self.source is not None else self.open_input_raster()
+        
+        if self.config.workers > 1:
+            self.histogram = ParallelTileExecutor(self.config).histogram(data)
+        else:
+            self.histogram = RasterHistogram.from_array(data)
+        self._record_original_stats(self.histogram)
+        
+        return data
+    
+    def _record_original_stats(self, histogram: 'RasterHistogram') -> None:
+        stats = histogram.summary()
+        stats['shape'] = (self.config.height, self.config.width)
+        self.metadata['original_stats'] = stats
         
+        logger.info(f"Generated data - min: {stats['min']}, max: {stats['max']}, "
+                   f"zeros: {stats['zeros']} ({stats['zeros']/histogram.total*100:.2f}%)")
+    
+    def _log_block(self, data: np.ndarray) -> Tuple[np.ndarray, int]:
+        """10·log10 of a uint16 block as float, NaN where the input is zero."""
         dtype = np.float32 if self.config.use_float32 else np.float64
         working = data.astype(dtype)
         
-        del data
-        
         valid_mask = working > 0
-        num_invalid = (~valid_mask).sum()
-        
-        if num_invalid > 0:
-            logger.warning(f"Found {num_invalid} zero/negative values "
-                          f"({num_invalid/working.size*100:.2f}% of data)")
+        num_invalid = int((~valid_mask).sum())
         
         working = np.where(
             valid_mask,
             10 * np.log10(working, where=valid_mask, out=working),
             np.nan  # Use NaN for invalid values
         )
+        return working, num_invalid
+    
+    def _scale_block(self, log_data: np.ndarray) -> int:
+        """Multiply values below the threshold in place; return how many were scaled."""
+        below_threshold = (log_data < self.config.log_threshold) & ~np.isnan(log_data)
+        log_data[below_threshold] *= self.config.log_multiplier
+        return int(below_threshold.sum())
+    
+    @staticmethod
+    def _quantize_block(data: np.ndarray, min_val, max_val) -> np.ndarray:
+        """Map a float block onto 0-255 using a global range; NaN becomes 0."""
+        normalized = np.nan_to_num(
+            (data - min_val) / (max_val - min_val),
+            nan=0.0
+        )
+        
+        # Convert to uint8
+        return (normalized * 255).astype(np.uint8)
+    
+    def _code_values(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Log and scaled values of every uint16 code, via the pixel kernels."""
+        log_values, _ = self._log_block(np.arange(RasterHistogram.BINS, dtype=np.uint16))
+        scaled_values = log_values.copy()
+        self._scale_block(scaled_values)
+        return log_values, scaled_values
+    
+    @instrumented
+    def apply_log_transform(self, data: np.ndarray,
+                            histogram: Optional['RasterHistogram'] = None) -> np.ndarray:
+        logger.info("Applying log10 transformation...")
+        
+        working, num_invalid = self._log_block(data)
+        
+        del data
+        
+        if num_invalid > 0:
+            logger.warning(f"Found {num_invalid} zero/negative values "
+                          f"({num_invalid/working.size*100:.2f}% of data)")
+        
+        if histogram is not None:
+            log_values, _ = self._code_values()
+            stats = histogram.weighted_stats(log_values)
+        else:
+            stats = {
+                'min': np.nanmin(working),
+                'max': np.nanmax(working),
+                'mean': np.nanmean(working)
+            }
         
         self.metadata['log_stats'] = {
-            'min': float(np.nanmin(working)),
-            'max': float(np.nanmax(working)),
-            'mean': float(np.nanmean(working)),
+            'min': float(stats['min']),
+            'max': float(stats['max']),
+            'mean': float(stats['mean']),
             'invalid_count': int(num_invalid)
         }
         
-        logger.info(f"Log transform - range: [{np.nanmin(working):.2f}, {np.nanmax(working):.2f}]")
+        logger.info(f"Log transform - range: [{stats['min']:.2f}, {stats['max']:.2f}]")
         
         return working
     
-    def apply_conditional_scaling(self, log_data: np.ndarray) -> np.ndarray:
+    @instrumented
+    def apply_conditional_scaling(self, log_data: np.ndarray,
+                                  histogram: Optional['RasterHistogram'] = None) -> np.ndarray:
         
         logger.info(f"Applying conditional scaling (threshold: {self.config.log_threshold})...")
         
-        below_threshold = (log_data < self.config.log_threshold) & ~np.isnan(log_data)
-        num_below = below_threshold.sum()
+        num_below = self._scale_block(log_data)
         
         logger.info(f"Values below threshold: {num_below} "
                    f"({num_below/log_data.size*100:.2f}%)")
         
-        log_data[below_threshold] *= self.config.log_multiplier
+        if histogram is not None:
+            _, scaled_values = self._code_values()
+            stats = histogram.weighted_stats(scaled_values)
+        else:
+            stats = {'min': np.nanmin(log_data), 'max': np.nanmax(log_data)}
         
         self.metadata['scaled_stats'] = {
-            'min': float(np.nanmin(log_data)),
-            'max': float(np.nanmax(log_data)),
+            'min': float(stats['min']),
+            'max': float(stats['max']),
             'scaled_count': int(num_below)
         }
         
         return log_data
     
-    def normalize_to_uint8(self, data: np.ndarray) -> np.ndarray:
+    @instrumented
+    def normalize_to_uint8(self, data: np.ndarray,
+                           histogram: Optional['RasterHistogram'] = None) -> np.ndarray:
         """
         Normalize data to 0-255 range for image display.
         
-        Handles edge cases and NaN values.
+        Handles edge cases and NaN values. When ``histogram`` (of the uint16
+        raster ``data`` was derived from) is given, the range is taken from
+        it instead of scanning ``data``.
         """
         logger.info("Normalizing to uint8 range...")
         
-        valid_data = data[~np.isnan(data)]
+        if histogram is not None:
+            _, scaled_values = self._code_values()
+            stats = histogram.weighted_stats(scaled_values)
+            has_valid = stats['valid_count'] > 0
+            min_val, max_val = stats['min'], stats['max']
+        else:
+            valid_data = data[~np.isnan(data)]
+            has_valid = valid_data.size > 0
+            if has_valid:
+                min_val = valid_data.min()
+                max_val = valid_data.max()
+            del valid_data
         
-        if valid_data.size == 0:
+        if not has_valid:
             logger.error("No valid data to normalize!")
             return np.zeros_like(data, dtype=np.uint8)
         
-        min_val = valid_data.min()
-        max_val = valid_data.max()
-        
         logger.info(f"Normalization range: [{min_val:.2f}, {max_val:.2f}]")
         
         # Handle edge case: all values identical
@@ -158,49 +1060,238 @@ class ImageProcessor:
             logger.warning("All values identical - setting to mid-range (127)")
             return np.full(data.shape, 127, dtype=np.uint8)
         
-        normalized = np.nan_to_num(
-            (data - min_val) / (max_val - min_val),
-            nan=0.0
-        )
+        output = self._quantize_block(data, min_val, max_val)
         
-        # Convert to uint8
-        output = (normalized * 255).astype(np.uint8)
+        if histogram is not None:
+            self._record_normalization(histogram, scaled_values, min_val, max_val)
+        else:
+            self.metadata['normalization'] = {
+                'min_value': float(min_val),
+                'max_value': float(max_val),
+                'output_range': [int(output.min()), int(output.max())]
+            }
+        
+        return output
+    
+    def propagate_stats(self, histogram: 'RasterHistogram'
+                        ) -> Optional[Tuple[np.ndarray, float, float]]:
+        """
+        Derive log and scaling statistics from the input histogram.
+        
+        Records ``log_stats`` and ``scaled_stats`` and returns the per-code
+        scaled values with the normalization range, or None when no pixel
+        survives the log transform.
+        """
+        log_values, scaled_values = self._code_values()
+        log_stats = histogram.weighted_stats(log_values)
+        scaled_stats = histogram.weighted_stats(scaled_values)
+        below = ~np.isnan(log_values) & (log_values < self.config.log_threshold)
+        scaled_count = histogram.count_where(below)
+        total = histogram.total
+        
+        if log_stats['invalid_count'] > 0:
+            logger.warning(f"Found {log_stats['invalid_count']} zero/negative values "
+                          f"({log_stats['invalid_count']/total*100:.2f}% of data)")
+        logger.info(f"Values below threshold: {scaled_count} "
+                   f"({scaled_count/total*100:.2f}%)")
+        
+        self.metadata['log_stats'] = {
+            'min': float(log_stats['min']),
+            'max': float(log_stats['max']),
+            'mean': float(log_stats['mean']),
+            'invalid_count': log_stats['invalid_count']
+        }
+        self.metadata['scaled_stats'] = {
+            'min': float(scaled_stats['min']),
+            'max': float(scaled_stats['max']),
+            'scaled_count': scaled_count
+        }
+        
+        if scaled_stats['valid_count'] == 0:
+            logger.error("No valid data to normalize!")
+            return None
+        
+        min_val, max_val = scaled_stats['min'], scaled_stats['max']
+        logger.info(f"Normalization range: [{min_val:.2f}, {max_val:.2f}]")
+        return scaled_values, min_val, max_val
+    
+    def _record_normalization(self, histogram: 'RasterHistogram', scaled_values: np.ndarray,
+                              min_val, max_val) -> np.ndarray:
+        """Quantize every code, record ``normalization`` and return the code table."""
+        table = self._quantize_block(scaled_values, min_val, max_val)
+        present = histogram.counts > 0
         
         self.metadata['normalization'] = {
             'min_value': float(min_val),
             'max_value': float(max_val),
-            'output_range': [int(output.min()), int(output.max())]
+            'output_range': [int(table[present].min()), int(table[present].max())]
         }
+        return table
+    
+    def build_lookup_table(self, histogram: 'RasterHistogram') -> np.ndarray:
+        """
+        Build the uint16 → uint8 mapping for the log/scale/normalize chain.
         
-        return output
+        Every output pixel depends only on its input value, so the float
+        kernels are run once over all 65,536 codes. The normalization range is
+        taken from the codes present in ``histogram``, which makes ``lut[data]``
+        identical to the float path.
+        """
+        logger.info("Building 65,536-entry lookup table...")
+        
+        derived = self.propagate_stats(histogram)
+        if derived is None:
+            return np.zeros(RasterHistogram.BINS, dtype=np.uint8)
+        
+        scaled_values, min_val, max_val = derived
+        if max_val == min_val:
+            logger.warning("All values identical - setting to mid-range (127)")
+            return np.full(RasterHistogram.BINS, 127, dtype=np.uint8)
+        
+        return self._record_normalization(histogram, scaled_values, min_val, max_val)
+    
+    @instrumented
+    def apply_lookup_table(self, data: np.ndarray,
+                           histogram: Optional['RasterHistogram'] = None,
+                           out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Run the whole log/scale/normalize chain as a single LUT gather."""
+        if histogram is None:
+            histogram = RasterHistogram.from_array(data)
+        lut = self.build_lookup_table(histogram)
+        if out is None:
+            out = np.empty(data.shape, dtype=np.uint8)
+        
+        # Gather in row chunks: take() widens the uint16 indices to intp.
+        chunk_rows = max(1, RasterHistogram.CHUNK_ELEMENTS // max(1, data.shape[1]))
+        for start in range(0, data.shape[0], chunk_rows):
+            np.take(lut, data[start:start + chunk_rows], out=out[start:start + chunk_rows])
+        return out
+    
+    @instrumented
+    def process_streaming(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Run generate → log → scale → normalize over row blocks.
+        
+        The first pass only builds the input histogram (skipped when one is
+        already known), from which every statistic and the normalization
+        range follow; the second regenerates
+        each block and quantizes it into ``out``. Only one block of
+        intermediates is alive at a time, and the result is identical to the
+        full-array path.
+        """
+        if self.config.input_path and self.source is None:
+            self.open_input_raster()
+        
+        height, width = self.config.height, self.config.width
+        block_rows = self._rows_per_block()
+        logger.info(f"Streaming {height}×{width} raster in blocks of {block_rows} rows")
+        
+        if out is None:
+            out = np.empty((height, width), dtype=np.uint8)
+        
+        if self.histogram is None:
+            self.histogram = RasterHistogram()
+            for _, _, block in self._iter_row_blocks():
+                self.histogram.update(block)
+        self._record_original_stats(self.histogram)
+        
+        if self.config.engine == "lut":
+            lut = self.build_lookup_table(self.histogram)
+            for start, stop, block in self._iter_row_blocks():
+                np.take(lut, block, out=out[start:stop])
+                self._add_overview_rows(out[start:stop])
+            return out
+        
+        derived = self.propagate_stats(self.histogram)
+        if derived is None:
+            out[...] = 0
+            self._add_overview_rows(out)
+            return out
+        
+        scaled_values, min_val, max_val = derived
+        if max_val == min_val:
+            logger.warning("All values identical - setting to mid-range (127)")
+            out[...] = 127
+            self._add_overview_rows(out)
+            return out
+        
+        kernel = FusedKernel(self.config) if self.config.engine == "fused" else None
+        for start, stop, block in self._iter_row_blocks():
+            if kernel is not None:
+                kernel.run(block, out[start:stop], min_val, max_val)
+            else:
+                working, _ = self._log_block(block)
+                self._scale_block(working)
+                out[start:stop] = self._quantize_block(working, min_val, max_val)
+            self._add_overview_rows(out[start:stop])
+        
+        self._record_normalization(self.histogram, scaled_values, min_val, max_val)
+        return out
     
     def create_visualization(self, img_data: np.ndarray, save: bool = True) -> None:
-        logger.info("Creating visualization...")
+        if self.config.output_format == "png":
+            if save:
+                self.write_png(img_data)
+            return
         
-        fig, ax = plt.subplots(figsize=(12, 4))        
-        im = ax.imshow(img_data, cmap=self.config.colormap, aspect='auto')
+        logger.info("Creating visualization...")
         
-        cbar = plt.colorbar(im, ax=ax, label='Intensity (0-255)')
+        import matplotlib.pyplot as plt
         
-        title = (f"Processed Log Image (threshold={self.config.log_threshold}, "
-                f"scale={self.config.log_multiplier}x)")
-        ax.set_title(title)        
-        ax.set_xlabel('Width (pixels)')
-        ax.set_ylabel('Height (pixels)')
+        figsize = (12, 4)
+        imshow_kwargs = {}
+        if self.overviews is not None:
+            # Render from the coarsest level that still covers the figure's pixels
+            height, width = img_data.shape
+            pyramid = OverviewPyramid(self._result_path())
+            factor = pyramid.best_factor(min(height, figsize[1] * self.config.dpi),
+                                         min(width, figsize[0] * self.config.dpi))
+            if factor is not None:
+                logger.info(f"Rendering from {factor}× overview")
+                img_data = pyramid.read(factor)
+                imshow_kwargs['extent'] = (0, width, height, 0)
         
-        plt.tight_layout()
+        with self.instrumentation.stage('create_visualization', img_data.size):
+            fig, ax = plt.subplots(figsize=figsize)        
+            im = ax.imshow(img_data, cmap=self.config.colormap, aspect='auto', **imshow_kwargs)
+            
+            cbar = plt.colorbar(im, ax=ax, label='Intensity (0-255)')
+            
+            title = (f"Processed Log Image (threshold={self.config.log_threshold}, "
+                    f"scale={self.config.log_multiplier}x)")
+            ax.set_title(title)        
+            ax.set_xlabel('Width (pixels)')
+            ax.set_ylabel('Height (pixels)')
+            
+            plt.tight_layout()
+            
+            if save:
+                output_path = Path(self.config.output_path)            
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                plt.savefig(output_path, dpi=self.config.dpi, bbox_inches='tight')
         
         if save:
-            output_path = Path(self.config.output_path)            
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            plt.savefig(output_path, dpi=self.config.dpi, bbox_inches='tight')
             logger.info(f"✓ Image saved: {output_path} ({self._get_file_size(output_path)})")            
             self._save_metadata(output_path.with_suffix('.json'))
         
-        plt.show()
+        if self.config.show_plot:
+            plt.show()
         plt.close(fig)
     
+    def write_png(self, img_data: np.ndarray) -> None:
+        """Write the uint8 result directly as a grayscale PNG, without matplotlib."""
+        if self.config.colormap != "gray":
+            logger.warning(f"Direct PNG output is grayscale; colormap "
+                           f"'{self.config.colormap}' ignored")
+        
+        output_path = Path(self.config.output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with self.instrumentation.stage('write_png', img_data.size):
+            write_grayscale_png(output_path, img_data, self.config.png_compression)
+        logger.info(f"✓ Image saved: {output_path} ({self._get_file_size(output_path)})")
+        self._save_metadata(output_path.with_suffix('.json'))
+    
     def _get_file_size(self, path: Path) -> str:
         """Get human-readable file size."""
         size = path.stat().st_size
@@ -219,29 +1310,212 @@ class ImageProcessor:
             'seed': self.config.seed,
             'log_threshold': self.config.log_threshold,
             'log_multiplier': self.config.log_multiplier,
-            'colormap': self.config.colormap
+            'colormap': self.config.colormap,
+            'input_path': self.config.input_path,
+            'output_raster_path': self.config.output_raster_path
         }
         
+        self._record_instrumentation()
+        
         with open(path, 'w') as f:
             json.dump(self.metadata, f, indent=2)
         
         logger.info(f"Metadata saved: {path}")
     
+    def _record_instrumentation(self) -> None:
+        """Copy stage measurements into the metadata, next to the memory estimate."""
+        self.metadata['stages'] = dict(self.instrumentation.stages)
+        self.metadata['memory'] = {
+            'estimated_peak_mb': self.estimate_memory_usage()['peak_mb'],
+            'measured_peak_mb': self.instrumentation.peak_mb
+        }
+    
+    def _add_overview_rows(self, rows: np.ndarray) -> None:
+        """Feed finished output rows to the overview builder, if one is active."""
+        if self.overviews is None:
+            return
+        band = max(1, RasterHistogram.CHUNK_ELEMENTS // max(1, rows.shape[1]))
+        for start in range(0, rows.shape[0], band):
+            self.overviews.add_rows(np.asarray(rows[start:start + band]))
+    
+    def _result_path(self) -> Path:
+        return Path(self.config.output_raster_path or self.config.output_path)
+    
+    def _create_output(self) -> Optional[np.ndarray]:
+        if not self.config.output_raster_path:
+            return None
+        return create_output_raster(Path(self.config.output_raster_path),
+                                    (self.config.height, self.config.width))
+    
+    @instrumented
+    def apply_fused_kernel(self, data: np.ndarray,
+                           histogram: Optional['RasterHistogram'] = None,
+                           out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Run log/scale/normalize through the chunked in-place kernel."""
+        if histogram is None:
+            histogram = RasterHistogram.from_array(data)
+        if out is None:
+            out = np.empty(data.shape, dtype=np.uint8)
+        
+        derived = self.propagate_stats(histogram)
+        if derived is None:
+            out[...] = 0
+            return out
+        
+        scaled_values, min_val, max_val = derived
+        if max_val == min_val:
+            logger.warning("All values identical - setting to mid-range (127)")
+            out[...] = 127
+            return out
+        
+        FusedKernel(self.config).run(data, out, min_val, max_val)
+        self._record_normalization(histogram, scaled_values, min_val, max_val)
+        return out
+    
+    def transform(self, data: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Map an in-memory or mapped uint16 raster to uint8 with the configured engine."""
+        if self.config.workers > 1:
+            with self.instrumentation.stage('parallel_tiles', data.size):
+                return ParallelTileExecutor(self.config).run(self, data, self.histogram, out)
+        if self.config.engine == "lut":
+            return self.apply_lookup_table(data, self.histogram, out)
+        if self.config.engine == "fused":
+            return self.apply_fused_kernel(data, self.histogram, out)
+        
+        # Apply transformations (in-place where possible)
+        log_data = self.apply_log_transform(data, self.histogram)
+        scaled_data = self.apply_conditional_scaling(log_data, self.histogram)
+        final_img = self.normalize_to_uint8(scaled_data, self.histogram)
+        
+        # Free intermediate data
+        del scaled_data, log_data
+        
+        if out is not None:
+            out[...] = final_img
+            final_img = out
+        return final_img
+    
+    def _start_overviews(self) -> None:
+        if self.config.overview_levels > 0:
+            self.overviews = OverviewBuilder(self._result_path(),
+                                             (self.config.height, self.config.width),
+                                             self.config.overview_levels,
+                                             self.config.overview_method)
+    
+    def _finish_outputs(self, final_img: np.ndarray) -> None:
+        """Close out overviews and the raster file, then render the image."""
+        if self.overviews is not None:
+            self.metadata['overviews'] = self.overviews.finish()
+        
+        if self.config.output_raster_path and isinstance(final_img, np.memmap):
+            final_img.flush()
+            logger.info(f"✓ Raster saved: {self.config.output_raster_path}")
+        
+        # Create visualization
+        self.create_visualization(final_img)
+    
+    def _cache_keys(self) -> Tuple[str, str]:
+        """Keys of the input-side stages and of the final uint8 output."""
+        fields = {'height': self.config.height, 'width': self.config.width}
+        if self.config.input_path:
+            stat = Path(self.config.input_path).stat()
+            fields['input'] = {'path': str(Path(self.config.input_path).resolve()),
+                               'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        else:
+            fields['seed'] = self.config.seed
+            fields['generator'] = self.config.generator
+            if self.config.generator == "seedsequence":
+                fields['tile_size'] = self.config.tile_size
+        
+        input_key = StageCache.key('input', fields)
+        output_key = StageCache.key('output', {
+            'input': input_key,
+            'log_threshold': self.config.log_threshold,
+            'log_multiplier': self.config.log_multiplier,
+            'use_float32': self.config.use_float32
+        })
+        return input_key, output_key
+    
+    def _load_cached_histogram(self, input_key: str) -> None:
+        counts = self.cache.load('histogram', input_key)
+        if counts is not None:
+            self.histogram = RasterHistogram(np.array(counts))
+    
+    def _read_input(self, input_key: Optional[str]) -> np.ndarray:
+        """Input raster for the full-array path, from disk, the cache or the generator."""
+        if self.config.input_path:
+            if self.histogram is None:
+                return self.load_raster()
+            self._record_original_stats(self.histogram)
+            return self.source
+        
+        if self.cache is not None:
+            data = self.cache.load('input', input_key)
+            if data is not None:
+                if self.histogram is None:
+                    self.histogram = RasterHistogram.from_array(data)
+                self._record_original_stats(self.histogram)
+                return data
+        
+        data = self.generate_synthetic_data()
+        if self.cache is not None:
+            self.cache.store('input', input_key, data)
+        return data
+    
+    def _cached_output(self, output_key: str) -> Optional[np.ndarray]:
+        """Final image from the cache, with stage metadata rederived from the histogram."""
+        if self.histogram is None:
+            self.cache.events['output'] = 'miss'
+            return None
+        cached = self.cache.load('output', output_key)
+        if cached is None:
+            return None
+        
+        self._record_original_stats(self.histogram)
+        self.build_lookup_table(self.histogram)
+        
+        out = self._create_output()
+        if out is None:
+            return cached
+        chunk_rows = max(1, RasterHistogram.CHUNK_ELEMENTS // self.config.width)
+        for start in range(0, self.config.height, chunk_rows):
+            out[start:start + chunk_rows] = cached[start:start + chunk_rows]
+        return out
+    
     def process(self) -> np.ndarray:
       
         try:
-            data = self.generate_synthetic_data()
-            
-            # Apply transformations (in-place where possible)
-            log_data = self.apply_log_transform(data)
-            scaled_data = self.apply_conditional_scaling(log_data)
-            final_img = self.normalize_to_uint8(scaled_data)
-            
-            # Free intermediate data
-            del scaled_data, log_data
-            
-            # Create visualization
-            self.create_visualization(final_img)
+            with self.instrumentation.session():
+                if self.config.input_path:
+                    self.open_input_raster()
+                self._start_overviews()
+                
+                input_key = output_key = None
+                final_img = None
+                if self.config.cache_dir:
+                    self.cache = StageCache(Path(self.config.cache_dir),
+                                            int(self.config.cache_max_mb * 1024**2))
+                    input_key, output_key = self._cache_keys()
+                    self._load_cached_histogram(input_key)
+                    final_img = self._cached_output(output_key)
+                
+                if final_img is not None:
+                    self._add_overview_rows(final_img)
+                elif self.config.streaming:
+                    final_img = self.process_streaming(out=self._create_output())
+                else:
+                    data = self._read_input(input_key)
+                    final_img = self.transform(data, self._create_output())
+                    self._add_overview_rows(final_img)
+                
+                if self.cache is not None:
+                    if self.cache.events.get('histogram') == 'miss':
+                        self.cache.store('histogram', input_key, self.histogram.counts)
+                    if self.cache.events.get('output') != 'hit':
+                        self.cache.store('output', output_key, final_img)
+                    self.metadata['cache'] = self.cache.summary()
+                
+                self._finish_outputs(final_img)
             
             logger.info("Processing completed successfully!")
             
@@ -281,11 +1555,448 @@ class ImageProcessor:
         print(f"\nOutput:")
         print(f"  File: {self.config.output_path}")
         print(f"  Colormap: {self.config.colormap}")
+        
+        stages = self.instrumentation.stages
+        if stages:
+            print(f"\nStages:")
+            print(f"  {'Stage':<26} {'Wall (s)':>8} {'CPU (s)':>8} {'Peak (MB)':>10} {'MP/s':>8}")
+            for name, record in stages.items():
+                peak = record.get('peak_mb')
+                rate = record['throughput_mp_s']
+                print(f"  {name:<26} {record['wall_s']:>8.3f} {record['cpu_s']:>8.3f} "
+                      f"{'n/a' if peak is None else f'{peak:.1f}':>10} "
+                      f"{'n/a' if rate is None else f'{rate:.1f}':>8}")
+            
+            measured = self.instrumentation.peak_mb
+            print(f"\nMemory:")
+            print(f"  Estimated peak: {self.estimate_memory_usage()['peak_mb']:.1f} MB")
+            print(f"  Measured peak: {'n/a' if measured is None else f'{measured:.1f} MB'}")
+        print("="*60 + "\n")
+
+
+def _tile_counts(tile: np.ndarray) -> np.ndarray:
+    return np.bincount(tile.ravel(), minlength=RasterHistogram.BINS)
+
+
+def _quantize_tile(config: ProcessingConfig, tile: np.ndarray, min_val, max_val) -> np.ndarray:
+    if config.engine == "fused":
+        return FusedKernel(config).run(tile, np.empty(tile.shape, dtype=np.uint8), min_val, max_val)
+    processor = ImageProcessor(config)
+    working, _ = processor._log_block(tile)
+    processor._scale_block(working)
+    return processor._quantize_block(working, min_val, max_val)
+
+
+def _gather_tile(lut: np.ndarray, tile: np.ndarray) -> np.ndarray:
+    return lut[tile]
+
+
+class ParallelTileExecutor:
+    """
+    Tile-parallel execution of the pixel pipeline.
+    
+    Runs in two phases: per-tile histograms are reduced into one global
+    histogram, which fixes the normalization range before any tile is
+    quantized; tiles are then quantized independently. Both phases only
+    combine integer counts or write disjoint tiles, so results do not depend
+    on worker count or scheduling and match the serial path exactly.
+    """
+    
+    def __init__(self, config: ProcessingConfig):
+        self.config = config
+    
+    def tiles(self, shape: Tuple[int, int]) -> List[Tuple[slice, slice]]:
+        size = self.config.tile_size
+        return [
+            (slice(row, min(row + size, shape[0])), slice(col, min(col + size, shape[1])))
+            for row in range(0, shape[0], size)
+            for col in range(0, shape[1], size)
+        ]
+    
+    def _pool(self):
+        if self.config.executor == "process":
+            return ProcessPoolExecutor(max_workers=self.config.workers)
+        return ThreadPoolExecutor(max_workers=self.config.workers)
+    
+    def _map_tiles(self, out: np.ndarray, index: List[Tuple[slice, slice]],
+                   worker, args: List[tuple]) -> None:
+        with self._pool() as pool:
+            futures = [pool.submit(worker, *tile_args) for tile_args in args]
+            for tile, future in zip(index, futures):
+                out[tile] = future.result()
+    
+    def histogram(self, data: np.ndarray) -> RasterHistogram:
+        """Global histogram reduced from per-tile counts."""
+        tiles = [data[index] for index in self.tiles(data.shape)]
+        histogram = RasterHistogram()
+        with self._pool() as pool:
+            for counts in pool.map(_tile_counts, tiles):
+                histogram.merge(RasterHistogram(counts))
+        return histogram
+    
+    def run(self, processor: 'ImageProcessor', data: np.ndarray,
+            histogram: Optional[RasterHistogram] = None,
+            out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Map a uint16 raster to uint8, recording stage metadata on ``processor``."""
+        if histogram is None:
+            histogram = self.histogram(data)
+        if out is None:
+            out = np.empty(data.shape, dtype=np.uint8)
+        
+        index = self.tiles(data.shape)
+        logger.info(f"Processing {len(index)} tiles on {self.config.workers} "
+                   f"{self.config.executor} workers")
+        
+        if self.config.engine == "lut":
+            lut = processor.build_lookup_table(histogram)
+            self._map_tiles(out, index, _gather_tile, [(lut, data[tile]) for tile in index])
+            return out
+        
+        derived = processor.propagate_stats(histogram)
+        if derived is None:
+            out[...] = 0
+            return out
+        
+        scaled_values, min_val, max_val = derived
+        if max_val == min_val:
+            logger.warning("All values identical - setting to mid-range (127)")
+            out[...] = 127
+            return out
+        
+        self._map_tiles(out, index, _quantize_tile,
+                        [(self.config, data[tile], min_val, max_val) for tile in index])
+        processor._record_normalization(histogram, scaled_values, min_val, max_val)
+        return out
+
+
+class ParameterSweep:
+    """
+    Evaluates many ``ProcessingConfig`` variants over one shared input raster.
+    
+    The raster is generated (or mapped) and histogrammed once. Each variant
+    then only builds its 65,536-entry lookup table from the shared histogram
+    and gathers it over the raster, writing its own image and metadata JSON.
+    The lookup table gives the same output as the float engine, so variants
+    are evaluated with it regardless of their ``engine`` setting.
+    """
+    
+    SHARED_FIELDS = ('width', 'height', 'seed', 'generator', 'tile_size', 'input_path')
+    
+    def __init__(self, variants: List[ProcessingConfig]):
+        if not variants:
+            raise ValueError("Parameter sweep needs at least one variant")
+        
+        base = variants[0]
+        for variant in variants[1:]:
+            differing = [name for name in self.SHARED_FIELDS
+                         if getattr(variant, name) != getattr(base, name)]
+            if differing:
+                raise ValueError(f"Sweep variants must share the input raster; "
+                                 f"differing fields: {differing}")
+        
+        self.variants = variants
+        self.processors: List[ImageProcessor] = []
+    
+    @staticmethod
+    def grid(base: ProcessingConfig, thresholds: Optional[List[float]] = None,
+             multipliers: Optional[List[float]] = None,
+             colormaps: Optional[List[str]] = None) -> List[ProcessingConfig]:
+        """Cartesian product of parameter values, each with its own output paths."""
+        variants = []
+        for threshold in thresholds or [base.log_threshold]:
+            for multiplier in multipliers or [base.log_multiplier]:
+                for colormap in colormaps or [base.colormap]:
+                    suffix = f"_t{threshold:g}_m{multiplier:g}_{colormap}"
+                    raster_path = base.output_raster_path
+                    if raster_path:
+                        raster_path = str(Path(raster_path).with_stem(Path(raster_path).stem + suffix))
+                    variants.append(replace(
+                        base,
+                        log_threshold=threshold,
+                        log_multiplier=multiplier,
+                        colormap=colormap,
+                        output_path=str(Path(base.output_path).with_stem(
+                            Path(base.output_path).stem + suffix)),
+                        output_raster_path=raster_path
+                    ))
+        return variants
+    
+    def run(self) -> List[ImageProcessor]:
+        logger.info(f"Running parameter sweep over {len(self.variants)} variants")
+        
+        source = ImageProcessor(self.variants[0])
+        if source.config.input_path:
+            data = source.load_raster()
+        else:
+            data = source.generate_synthetic_data()
+        
+        self.processors = []
+        for variant in self.variants:
+            processor = ImageProcessor(variant)
+            processor.source = source.source
+            processor.histogram = source.histogram
+            processor.metadata['original_stats'] = dict(source.metadata['original_stats'])
+            
+            logger.info(f"Variant: threshold={variant.log_threshold}, "
+                       f"multiplier={variant.log_multiplier}, colormap={variant.colormap}")
+            processor._start_overviews()
+            final_img = processor.apply_lookup_table(data, source.histogram,
+                                                     processor._create_output())
+            processor._add_overview_rows(final_img)
+            processor._finish_outputs(final_img)
+            
+            self.processors.append(processor)
+        
+        return self.processors
+    
+    def print_summary(self) -> None:
+        print("\n" + "="*60)
+        print("PARAMETER SWEEP SUMMARY")
+        print("="*60)
+        print(f"{'Threshold':>10} {'Multiplier':>11} {'Colormap':>10} {'Scaled':>12}  Output")
+        for processor in self.processors:
+            config = processor.config
+            scaled = processor.metadata.get('scaled_stats', {}).get('scaled_count', 0)
+            print(f"{config.log_threshold:>10g} {config.log_multiplier:>11g} "
+                  f"{config.colormap:>10} {scaled:>12,}  {config.output_path}")
+        print("="*60 + "\n")
+
+
+class PipelinedBatchRunner:
+    """
+    Processes a sequence of rasters with reading, computing and writing overlapped.
+    
+    A reader thread loads raster N+1 into one of two preallocated uint16
+    buffers while the calling thread computes raster N into one of two uint8
+    buffers, and a writer thread saves raster N-1. Bounded queues between the
+    stages keep at most two rasters in flight per stage; buffers are only
+    reallocated when a raster's shape differs from the previous one.
+    
+    Results are written as direct PNGs: matplotlib is not safe to drive
+    from the writer thread. Memory tracing is off, since tracemalloc is
+    global and stages run on two threads at once. When computing or writing
+    fails, the reader stops loading further rasters; on a compute error its
+    queue is also drained so it can finish before the error is re-raised.
+    """
+    
+    def __init__(self, config: ProcessingConfig, output_dir: Path):
+        self.config = config
+        self.output_dir = output_dir
+        self.busy = {'read': 0.0, 'compute': 0.0, 'write': 0.0}
+        self._errors: List[BaseException] = []
+        self._stop = threading.Event()
+    
+    @staticmethod
+    def _buffer(pool: 'queue.Queue', shape: Tuple[int, int], dtype) -> np.ndarray:
+        buffer = pool.get()
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=dtype)
+        return buffer
+    
+    def _read(self, paths: List[Path], free: 'queue.Queue', loaded: 'queue.Queue') -> None:
+        try:
+            for path in paths:
+                if self._stop.is_set() or self._errors:
+                    break
+                source = open_raster(path, self.config.height, self.config.width)
+                buffer = self._buffer(free, source.shape, np.uint16)
+                started = time.perf_counter()
+                np.copyto(buffer, source)
+                self.busy['read'] += time.perf_counter() - started
+                loaded.put((path, buffer))
+        except BaseException as e:
+            self._errors.append(e)
+        finally:
+            loaded.put(None)
+    
+    def _write(self, written: 'queue.Queue', free: 'queue.Queue') -> None:
+        while True:
+            item = written.get()
+            if item is None:
+                return
+            processor, result = item
+            try:
+                if not self._errors and not self._stop.is_set():
+                    started = time.perf_counter()
+                    np.save(self.output_dir / f"{Path(processor.config.input_path).stem}.npy", result)
+                    processor.create_visualization(result)
+                    self.busy['write'] += time.perf_counter() - started
+            except BaseException as e:
+                self._errors.append(e)
+                self._stop.set()
+            finally:
+                free.put(result)
+    
+    @staticmethod
+    def _drain(loaded: 'queue.Queue', free: 'queue.Queue') -> None:
+        """Hand queued inputs back to the reader until its end marker arrives."""
+        while True:
+            item = loaded.get()
+            if item is None:
+                return
+            free.put(item[1])
+    
+    def run(self, paths: List[Path]) -> dict:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        free_inputs, free_outputs = queue.Queue(), queue.Queue()
+        for _ in range(2):
+            free_inputs.put(None)
+            free_outputs.put(None)
+        loaded, written = queue.Queue(maxsize=1), queue.Queue(maxsize=1)
+        
+        reader = threading.Thread(target=self._read, args=(paths, free_inputs, loaded), daemon=True)
+        writer = threading.Thread(target=self._write, args=(written, free_outputs), daemon=True)
+        
+        logger.info(f"Batch processing {len(paths)} rasters into {self.output_dir}")
+        started = time.perf_counter()
+        reader.start()
+        writer.start()
+        
+        pixels = 0
+        finished = False
+        try:
+            while True:
+                item = loaded.get()
+                if item is None:
+                    finished = True
+                    break
+                path, data = item
+                if self._errors:
+                    free_inputs.put(data)
+                    continue
+                
+                compute_started = time.perf_counter()
+                processor = ImageProcessor(replace(
+                    self.config,
+                    height=data.shape[0], width=data.shape[1],
+                    input_path=str(path), output_raster_path=None,
+                    output_path=str(self.output_dir / f"{path.stem}.png"), output_format="png",
+                    streaming=False, show_plot=False, overview_levels=0, cache_dir=None,
+                    trace_memory=False
+                ))
+                processor.histogram = RasterHistogram.from_array(data)
+                processor._record_original_stats(processor.histogram)
+                result = processor.transform(data, self._buffer(free_outputs, data.shape, np.uint8))
+                self.busy['compute'] += time.perf_counter() - compute_started
+                
+                free_inputs.put(data)
+                written.put((processor, result))
+                pixels += data.size
+        finally:
+            if not finished:
+                self._stop.set()
+            written.put(None)
+            if not finished:
+                self._drain(loaded, free_inputs)
+            reader.join()
+            writer.join()
+        
+        if self._errors:
+            raise self._errors[0]
+        
+        elapsed = time.perf_counter() - started
+        summary = {
+            'rasters': len(paths),
+            'megapixels': pixels / 1e6,
+            'elapsed_s': elapsed,
+            'throughput_mp_s': pixels / 1e6 / elapsed if elapsed else float('inf'),
+            'busy_s': dict(self.busy)
+        }
+        logger.info(f"Batch done: {summary['megapixels']:.1f} MP in {elapsed:.2f}s "
+                   f"({summary['throughput_mp_s']:.1f} MP/s)")
+        return summary
+    
+    def print_summary(self, summary: dict) -> None:
+        print("\n" + "="*60)
+        print("BATCH PROCESSING SUMMARY")
+        print("="*60)
+        print(f"Rasters: {summary['rasters']}")
+        print(f"Pixels: {summary['megapixels']:.1f} MP in {summary['elapsed_s']:.2f}s")
+        print(f"Throughput: {summary['throughput_mp_s']:.1f} MP/s")
+        busy = summary['busy_s']
+        print(f"Stage busy time: read {busy['read']:.2f}s, compute {busy['compute']:.2f}s, "
+              f"write {busy['write']:.2f}s")
         print("="*60 + "\n")
 
 
-def main():
+def measure_engine(config: ProcessingConfig) -> dict:
+    """Time one transform and record its traced peak and the process peak RSS."""
+    processor = ImageProcessor(replace(config, trace_memory=True))
+    data = processor.generate_synthetic_data()
+    
+    with processor.instrumentation.stage('transform', data.size):
+        processor.transform(data)
+    record = processor.instrumentation.stages['transform']
+    
+    try:
+        import resource
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        peak_rss_mb = None
+    
+    return {
+        'engine': config.engine,
+        'transform_s': record['wall_s'],
+        'transform_peak_mb': record['peak_mb'],
+        'process_peak_rss_mb': peak_rss_mb
+    }
+
+
+def compare_engines(config: ProcessingConfig, engines: List[str]) -> List[dict]:
+    """Measure each engine in a fresh process so peak RSS is not shared between runs."""
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for engine in engines:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.append(pool.submit(measure_engine, replace(config, engine=engine)).result())
+    
+    print("\n" + "="*60)
+    print("ENGINE COMPARISON")
+    print("="*60)
+    print(f"{'Engine':>8} {'Transform (s)':>14} {'Traced peak (MB)':>17} {'Peak RSS (MB)':>14}")
+    for result in results:
+        rss = result['process_peak_rss_mb']
+        print(f"{result['engine']:>8} {result['transform_s']:>14.3f} "
+              f"{result['transform_peak_mb']:>17.1f} {'n/a' if rss is None else f'{rss:.1f}':>14}")
+    print("="*60 + "\n")
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Log-transform and scale a 16-bit raster.")
+    parser.add_argument('--thresholds', type=float, nargs='+',
+                        help="Sweep over these log thresholds")
+    parser.add_argument('--multipliers', type=float, nargs='+',
+                        help="Sweep over these log multipliers")
+    parser.add_argument('--colormaps', nargs='+',
+                        help="Sweep over these colormaps")
+    parser.add_argument('--compare-engines', nargs='+', metavar='ENGINE',
+                        help="Report transform time and peak memory for these engines")
+    parser.add_argument('--batch-input', type=Path,
+                        help="Process every .npy raster in this directory")
+    parser.add_argument('--batch-output', type=Path, default=Path("batch_output"),
+                        help="Directory for batch results (default: batch_output)")
+    args = parser.parse_args(argv)
+    
     config = ProcessingConfig()
+    
+    if args.batch_input:
+        runner = PipelinedBatchRunner(config, args.batch_output)
+        summary = runner.run(sorted(args.batch_input.glob('*.npy')))
+        runner.print_summary(summary)
+        return summary
+    
+    if args.compare_engines:
+        return compare_engines(config, args.compare_engines)
+    
+    if args.thresholds or args.multipliers or args.colormaps:
+        sweep = ParameterSweep(ParameterSweep.grid(
+            config, args.thresholds, args.multipliers, args.colormaps
+        ))
+        sweep.run()
+        sweep.print_summary()
+        return sweep.processors
+    
     processor = ImageProcessor(config)
     
     result = processor.process()
@@ -296,4 +2007,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
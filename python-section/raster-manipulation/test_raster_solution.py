@@ -0,0 +1,250 @@
+import importlib.util
+import logging
+import sys
+import threading
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Loaded under its own name so this module can share a session with the grades tests
+_spec = importlib.util.spec_from_file_location("raster_solution", Path(__file__).with_name("solution.py"))
+solution = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = solution
+_spec.loader.exec_module(solution)
+
+logging.disable(logging.CRITICAL)
+
+HEIGHT, WIDTH = 61, 173
+
+
+def small_config(**overrides) -> solution.ProcessingConfig:
+    fields = dict(height=HEIGHT, width=WIDTH, tile_size=32, output_format="png",
+                  show_plot=False)
+    fields.update(overrides)
+    return solution.ProcessingConfig(**fields)
+
+
+def float_result(config: solution.ProcessingConfig) -> np.ndarray:
+    """The reference: the float engine over the whole array."""
+    processor = solution.ImageProcessor(replace(config, engine="float", workers=1,
+                                                streaming=False))
+    if config.input_path:
+        return processor.transform(processor.load_raster())
+    return processor.transform(processor.generate_synthetic_data())
+
+
+def test_synthetic_stream_matches_legacy_draws():
+    np.random.seed(7)
+    expected = np.random.randint(0, 65536, size=(HEIGHT, WIDTH), dtype=np.uint16)
+    stream = solution.SyntheticRasterStream(7, WIDTH)
+    rows = [stream.read_rows(count) for count in (1, 4, 13, 2, HEIGHT - 20)]
+    np.testing.assert_array_equal(np.concatenate(rows), expected)
+
+
+@pytest.mark.parametrize("generator", ["legacy", "seedsequence"])
+@pytest.mark.parametrize("engine", ["float", "lut", "fused"])
+def test_streaming_matches_full_array(engine, generator):
+    config = small_config(engine=engine, generator=generator, streaming=True,
+                          block_memory_mb=0.01)
+    result = solution.ImageProcessor(config).process_streaming()
+    np.testing.assert_array_equal(result, float_result(config))
+
+
+@pytest.mark.parametrize("use_float32", [True, False])
+@pytest.mark.parametrize("engine", ["lut", "fused"])
+def test_engines_match_float(engine, use_float32):
+    config = small_config(engine=engine, use_float32=use_float32)
+    processor = solution.ImageProcessor(config)
+    result = processor.transform(processor.generate_synthetic_data())
+    np.testing.assert_array_equal(result, float_result(config))
+
+
+def test_histogram_statistics_match_numpy():
+    data = np.random.default_rng(2).integers(0, 2000, (HEIGHT, WIDTH), dtype=np.uint16)
+    histogram = solution.RasterHistogram.from_array(data)
+    assert (histogram.min, histogram.max, histogram.zeros) == \
+        (data.min(), data.max(), int((data == 0).sum()))
+    assert histogram.mean == pytest.approx(data.mean())
+    for q in (0, 1, 25, 50, 99.5, 100):
+        assert histogram.percentile(q) == np.percentile(data, q)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+@pytest.mark.parametrize("engine", ["float", "lut", "fused"])
+def test_parallel_tiles_match_serial(engine, executor):
+    config = small_config(engine=engine, workers=3, executor=executor, tile_size=16)
+    processor = solution.ImageProcessor(config)
+    result = processor.transform(processor.generate_synthetic_data())
+    np.testing.assert_array_equal(result, float_result(config))
+
+
+def test_tiled_generator_rows_match_tiles():
+    generator = solution.TiledRasterGenerator(3, HEIGHT, WIDTH, 16)
+    full = generator.fill(np.empty((HEIGHT, WIDTH), dtype=np.uint16), workers=3)
+    for start, stop in [(0, HEIGHT), (5, 6), (15, 17), (3, 40), (HEIGHT - 1, HEIGHT)]:
+        np.testing.assert_array_equal(generator.read_rows(start, stop), full[start:stop])
+
+
+def test_streaming_reads_input_file(tmp_path):
+    path = tmp_path / "input.npy"
+    np.save(path, np.random.default_rng(1).integers(0, 65536, (HEIGHT, WIDTH), dtype=np.uint16))
+    config = small_config(input_path=str(path), streaming=True, block_memory_mb=0.01)
+    result = solution.ImageProcessor(config).process_streaming()
+    np.testing.assert_array_equal(result, float_result(config))
+
+
+def read_png(path: Path) -> np.ndarray:
+    Image = pytest.importorskip("PIL.Image")
+    with Image.open(path) as image:
+        assert image.mode == "L"
+        return np.asarray(image)
+
+
+@pytest.mark.parametrize("rows_per_chunk", [1, 7, 256])
+@pytest.mark.parametrize("compression_level", [0, 9])
+def test_png_writer_round_trips(tmp_path, rows_per_chunk, compression_level):
+    img = np.random.default_rng(5).integers(0, 256, (HEIGHT, WIDTH), dtype=np.uint8)
+    solution.write_grayscale_png(tmp_path / "out.png", img, compression_level, rows_per_chunk)
+    np.testing.assert_array_equal(read_png(tmp_path / "out.png"), img)
+
+
+def test_png_output_holds_the_result(tmp_path):
+    config = small_config(output_path=str(tmp_path / "out.png"))
+    result = solution.ImageProcessor(config).process()
+    np.testing.assert_array_equal(read_png(tmp_path / "out.png"), result)
+
+
+@pytest.mark.parametrize("method", ["mean", "decimate"])
+@pytest.mark.parametrize("bands", [[HEIGHT], [1] * HEIGHT, [7, 30, 1, 23]])
+def test_overviews_match_direct_reduction(tmp_path, method, bands):
+    img = np.random.default_rng(3).integers(0, 256, (HEIGHT, WIDTH), dtype=np.uint8)
+    builder = solution.OverviewBuilder(tmp_path / "result.npy", img.shape, 4, method)
+    start = 0
+    for rows in bands:
+        builder.add_rows(img[start:start + rows])
+        start += rows
+    builder.finish()
+
+    for factor in builder.factors:
+        if method == "decimate":
+            expected = img[::factor, ::factor]
+        else:
+            expected = np.array([
+                [np.rint(img[row:row + factor, col:col + factor].mean())
+                 for col in range(0, WIDTH, factor)]
+                for row in range(0, HEIGHT, factor)
+            ], dtype=np.uint8)
+        np.testing.assert_array_equal(builder.levels[factor], expected)
+
+
+def test_deep_overview_sums_do_not_wrap(tmp_path):
+    # From 8192× a block of 255s sums past 2**32; 13 levels cover one such block
+    size = 8192
+    builder = solution.OverviewBuilder(tmp_path / "result.npy", (size + 3, size + 5), 13)
+    band = np.full((1024, size + 5), 255, dtype=np.uint8)
+    for start in range(0, size + 3, band.shape[0]):
+        builder.add_rows(band[:min(band.shape[0], size + 3 - start)])
+    builder.finish()
+
+    assert builder.factors[-1] == size
+    for factor, level in builder.levels.items():
+        assert (np.asarray(level) == 255).all(), f"{factor}× level"
+
+
+def test_parameter_sweep_matches_single_runs(tmp_path):
+    base = small_config(output_path=str(tmp_path / "sweep.png"),
+                        output_raster_path=str(tmp_path / "sweep.npy"))
+    variants = solution.ParameterSweep.grid(base, thresholds=[8.0, 13.0], multipliers=[1.5, 3.0])
+    solution.ParameterSweep(variants).run()
+
+    assert len({variant.output_path for variant in variants}) == len(variants) == 4
+    results = []
+    for variant in variants:
+        results.append(np.load(variant.output_raster_path))
+        np.testing.assert_array_equal(results[-1], float_result(variant))
+        np.testing.assert_array_equal(read_png(variant.output_path), results[-1])
+    assert not all(np.array_equal(results[0], other) for other in results[1:])
+
+
+def test_parameter_sweep_rejects_different_inputs():
+    with pytest.raises(ValueError, match="seed"):
+        solution.ParameterSweep([small_config(), small_config(seed=1)])
+
+
+def test_cached_output_matches_fresh_run(tmp_path):
+    config = small_config(cache_dir=str(tmp_path / "cache"),
+                          output_path=str(tmp_path / "out.png"))
+    first = solution.ImageProcessor(config)
+    np.testing.assert_array_equal(first.process(), float_result(config))
+    second = solution.ImageProcessor(config)
+    np.testing.assert_array_equal(second.process(), float_result(config))
+    assert second.metadata['cache']['stages']['output'] == 'hit'
+
+
+def test_batch_runner_matches_single_runs(tmp_path):
+    rng = np.random.default_rng(4)
+    paths = []
+    for index, shape in enumerate([(HEIGHT, WIDTH), (HEIGHT, WIDTH), (20, 30)]):
+        paths.append(tmp_path / f"raster{index}.npy")
+        np.save(paths[-1], rng.integers(0, 65536, shape, dtype=np.uint16))
+
+    solution.PipelinedBatchRunner(small_config(), tmp_path / "out").run(paths)
+    for path in paths:
+        expected = float_result(small_config(input_path=str(path)))
+        np.testing.assert_array_equal(np.load(tmp_path / "out" / f"{path.stem}.npy"), expected)
+        np.testing.assert_array_equal(read_png(tmp_path / "out" / f"{path.stem}.png"), expected)
+
+
+def run_failing_batch(tmp_path, count: int) -> list:
+    """Run a batch in a thread and return the errors it raised, failing if it hangs."""
+    paths = []
+    for index in range(count):
+        paths.append(tmp_path / f"raster{index}.npy")
+        np.save(paths[-1], np.ones((8, 8), dtype=np.uint16))
+    errors = []
+
+    def run():
+        try:
+            solution.PipelinedBatchRunner(small_config(), tmp_path / "out").run(paths)
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive(), "batch runner hung after an error"
+    return errors
+
+
+def test_batch_runner_raises_compute_errors(tmp_path, monkeypatch):
+    transform = solution.ImageProcessor.transform
+    calls = []
+
+    def failing_transform(self, data, out=None):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("transform failed")
+        return transform(self, data, out)
+
+    monkeypatch.setattr(solution.ImageProcessor, "transform", failing_transform)
+    assert [str(e) for e in run_failing_batch(tmp_path, 5)] == ["transform failed"]
+
+
+def test_batch_runner_stops_reading_after_write_errors(tmp_path, monkeypatch):
+    open_raster = solution.open_raster
+    opened = []
+
+    def counting_open(*args):
+        opened.append(args[0])
+        return open_raster(*args)
+
+    def failing_write(self, img_data, save=True):
+        raise RuntimeError("write failed")
+
+    monkeypatch.setattr(solution, "open_raster", counting_open)
+    monkeypatch.setattr(solution.ImageProcessor, "create_visualization", failing_write)
+    assert [str(e) for e in run_failing_batch(tmp_path, 40)] == ["write failed"]
+    # At most the rasters already queued behind the failed write are read
+    assert len(opened) < 10
@@ -0,0 +1,422 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from solution import GradeConfig, GradeProcessor
+
+logger = logging.getLogger(__name__)
+
+MODES = {
+    'default': {},
+    'pandas-join': {'join_engine': 'pandas'},
+    'streaming': {'streaming': True},
+    'csv-export': {'export_format': 'csv'},
+}
+
+STAGES = ('load_and_prepare_data', 'merge_data_efficiently',
+          'calculate_final_grades', 'export_results')
+
+FIRST_NAMES = np.array(["Aaron", "Adam", "Amara", "Ben", "Carla", "Daisy", "Elena", "Farid",
+                        "Grace", "Hiro", "Ines", "Jamal", "Kira", "Liam", "Malaika", "Nora",
+                        "Omar", "Priya", "Quinn", "Richard", "Sofia", "Timothy", "Uma", "Victor",
+                        "Wen", "Ximena", "Yusuf", "Zoe"])
+LAST_NAMES = np.array(["Anderson", "Bennett", "Cooper", "Diaz", "Evans", "Flower", "Garcia",
+                       "Hughes", "Ito", "Johnson", "Kowalski", "Lambert", "Lester", "Moreno",
+                       "Nguyen", "Okafor", "Parker", "Qureshi", "Rossi", "Saunders", "Tanaka",
+                       "Usman", "Volkov", "Walsh", "Xu", "Young", "Zimmer"])
+LETTERS = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+
+
+@dataclass
+class GradebookSpec:
+    students: int
+    seed: int = 0
+    groups: int = 20
+    homeworks: int = 3
+    missing_rate: float = 0.02  # Share of students absent from each grade file
+    bad_id_rate: float = 0.005  # Share of grade rows whose SID matches no student
+    out_of_range_rate: float = 0.005  # Share of grades below zero or above the maximum
+    chunk_rows: int = 250_000  # Students generated and written per step
+
+    def __post_init__(self):
+        if self.students < 1:
+            raise ValueError("Student count must be positive")
+        if self.groups < 1 or self.homeworks < 1:
+            raise ValueError("Group and homework counts must be positive")
+        for name in ('missing_rate', 'bad_id_rate', 'out_of_range_rate'):
+            if not 0 <= getattr(self, name) <= 1:
+                raise ValueError(f"{name} must be between 0 and 1")
+        if self.chunk_rows < 1:
+            raise ValueError("Chunk size must be positive")
+
+
+def _chunks(spec: GradebookSpec):
+    for start in range(0, spec.students, spec.chunk_rows):
+        yield start, min(start + spec.chunk_rows, spec.students)
+
+
+def _roster(spec: GradebookSpec, start: int, stop: int) -> pd.DataFrame:
+    """Students ``start:stop``; the same for every file, so the files agree on who is who."""
+    rng = np.random.default_rng([spec.seed, 0, start])
+    index = np.arange(start, stop, dtype=np.int64)
+    first = rng.choice(FIRST_NAMES, len(index))
+    last = pd.Series(rng.choice(LAST_NAMES, len(index)))
+    barrelled = rng.random(len(index)) < 0.5
+    last = last.where(~barrelled, last + "-" + rng.choice(LAST_NAMES, len(index)))
+    middle = np.where(rng.random(len(index)) < 0.6, rng.choice(LETTERS, len(index)), "x")
+
+    # Multiplying by a number coprime to 10 permutes the digits' range, keeping IDs unique
+    id_width = max(7, len(str(spec.students)))
+    net_width = max(5, len(str(spec.students - 1)))
+    ids = (index * 7919 + 1234567) % 10**id_width
+    digits = pd.Series((index * 104729 + 12345) % 10**net_width).astype(str).str.zfill(net_width)
+    initials = (pd.Series(first).str[0].str.lower() + middle
+                + last.str[0].str.lower())
+
+    return pd.DataFrame({
+        "ID": ids,
+        "First Name": first,
+        "Last Name": last.to_numpy(),
+        "Middle": middle,
+        "NetID": (initials + digits).to_numpy(),
+        "Group": rng.integers(1, spec.groups + 1, len(index)),
+    })
+
+
+def _grades(rng: np.random.Generator, n: int, mean: float, std: float, max_val: int,
+            out_of_range_rate: float) -> np.ndarray:
+    grades = np.clip(np.rint(rng.normal(mean, std, n)), 0, max_val).astype(np.int64)
+    bad = rng.random(n) < out_of_range_rate
+    low = rng.random(n) < 0.5
+    grades[bad & low] = -rng.integers(1, 10, n)[bad & low]
+    grades[bad & ~low] = max_val + rng.integers(1, max(2, max_val // 5), n)[bad & ~low]
+    return grades
+
+
+def _grade_rows(spec: GradebookSpec, roster: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """Roster rows present in one grade file, with some SIDs replaced by unknown IDs."""
+    rows = roster[rng.random(len(roster)) >= spec.missing_rate].reset_index(drop=True)
+    sid = rows["NetID"].to_numpy(dtype=object)
+    bad = np.flatnonzero(rng.random(len(rows)) < spec.bad_id_rate)
+    # Two letters then digits never matches the three-letter roster NetIDs
+    sid[bad] = [f"zz{n:06d}" for n in rng.integers(0, 10**6, len(bad))]
+    return rows.assign(SID=sid)
+
+
+def write_gradebook(spec: GradebookSpec, directory: Path) -> None:
+    """
+    Write ``Homework_and_exams.csv``, both quiz CSVs and ``students.json``.
+
+    Files are generated chunk by chunk from seeded generators, so output is
+    reproducible for a given spec and memory stays flat at any scale. Each
+    grade file misses some students, carries some unknown SIDs and has
+    some grades out of range, like the raw exports the pipeline expects.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    config = GradeConfig()
+    opened = datetime(2019, 8, 29, 8, 56, 2)
+
+    with open(directory / "students.json", "w") as roster_file, \
+            open(directory / "Homework_and_exams.csv", "w", newline="") as hw_file, \
+            open(directory / "quiz_1_grades.csv", "w", newline="") as quiz1_file, \
+            open(directory / "quiz_2_grades.csv", "w", newline="") as quiz2_file:
+        roster_file.write('"[')
+        for chunk, (start, stop) in enumerate(_chunks(spec)):
+            roster = _roster(spec, start, stop)
+            header = chunk == 0
+
+            records = pd.DataFrame({
+                "ID": roster["ID"],
+                "Name": (roster["Last Name"] + ", " + roster["First Name"]
+                         + np.where(roster["Middle"] == "x", "",
+                                    " " + roster["Middle"].str.upper() + ".")),
+                "NetID": roster["NetID"].str.upper(),
+                "Group": roster["Group"],
+            }).to_json(orient="records")[1:-1]
+            # The roster is a JSON array serialized into a JSON string
+            roster_file.write(("" if header else ",") + json.dumps(records)[1:-1])
+
+            rng = np.random.default_rng([spec.seed, 1, start])
+            rows = _grade_rows(spec, roster, rng)
+            hw = rows[["First Name", "Last Name", "SID"]].copy()
+            for k in range(1, spec.homeworks + 1):
+                hw[f"Homework {k}"] = _grades(rng, len(rows), 82, 12, config.homework_max,
+                                              spec.out_of_range_rate)
+                due = opened + timedelta(days=7 * (k - 1))
+                hw[f"Homework {k} - Submission Time"] = f"{due:%Y-%m-%d %H:%M:%S}-07:00"
+            hw["Exam"] = _grades(rng, len(rows), 75, 15, config.exam_max, spec.out_of_range_rate)
+            hw["Exam - Submission Time"] = "2019-10-08 12:30:07-07:00"
+            hw.to_csv(hw_file, header=header, index=False)
+
+            for quiz, quiz_file in ((1, quiz1_file), (2, quiz2_file)):
+                rng = np.random.default_rng([spec.seed, 1 + quiz, start])
+                rows = _grade_rows(spec, roster, rng)
+                pd.DataFrame({
+                    "Last Name": rows["Last Name"],
+                    "First Name": rows["First Name"],
+                    "Grade": _grades(rng, len(rows), 7.5, 2, config.quiz_max,
+                                     spec.out_of_range_rate),
+                    "SID": rows["SID"],
+                }).to_csv(quiz_file, header=header, index=False)
+        roster_file.write(']"')
+
+
+def prepare_gradebook(spec: GradebookSpec, directory: Path) -> Path:
+    """Generated data for ``spec`` under ``directory``, reused when it already exists."""
+    target = Path(directory) / f"students-{spec.students}-seed-{spec.seed}"
+    spec_file = target / "gradebook.json"
+    spec_json = json.dumps(asdict(spec), sort_keys=True)
+    if spec_file.exists() and spec_file.read_text() == spec_json:
+        logger.info(f"Reusing gradebook {target}")
+        return target
+
+    logger.info(f"Generating {spec.students} students in {target}...")
+    started = time.perf_counter()
+    write_gradebook(spec, target)
+    spec_file.write_text(spec_json)
+    logger.info(f"  generated in {time.perf_counter() - started:.1f}s")
+    return target
+
+
+@dataclass
+class BenchmarkCase:
+    students: int
+    mode: str
+
+    @property
+    def case_id(self) -> str:
+        return f"{self.students}-{self.mode}"
+
+
+def _peak_rss_mb(reset: bool = False) -> Optional[float]:
+    """
+    Peak resident memory since the last reset, in MB.
+
+    Linux can reset the high-water mark through ``/proc/self/clear_refs``,
+    which gives each stage its own peak; elsewhere this is the peak of the
+    whole process so far.
+    """
+    status = Path("/proc/self/status")
+    if status.exists():
+        if reset:
+            Path("/proc/self/clear_refs").write_text("5")
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+
+def _stage(stages: Dict[str, dict], name: str, func, *args):
+    _peak_rss_mb(reset=True)
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    result = func(*args)
+    stages[name] = {
+        'wall_s': time.perf_counter() - started,
+        'cpu_s': time.process_time() - cpu_started,
+        'peak_rss_mb': _peak_rss_mb()
+    }
+    return result
+
+
+def run_case(case: BenchmarkCase, data_dir: str, workdir: str) -> dict:
+    """Run one case; meant to execute in a fresh process so memory peaks are its own."""
+    logging.disable(logging.WARNING)
+    config = GradeConfig(base_dir=Path(data_dir),
+                         output_file=str(Path(workdir) / f"{case.case_id}.xlsx"),
+                         **MODES[case.mode])
+    processor = GradeProcessor(config)
+    stages: Dict[str, dict] = {}
+
+    started = time.perf_counter()
+    frames = _stage(stages, 'load_and_prepare_data', processor.load_and_prepare_data)
+    merged = _stage(stages, 'merge_data_efficiently', processor.merge_data_efficiently, *frames)
+    del frames
+    final_df = _stage(stages, 'calculate_final_grades', processor.calculate_final_grades, merged)
+    del merged
+    _stage(stages, 'export_results', processor.export_results, final_df)
+    wall_s = time.perf_counter() - started
+
+    return {
+        'case': case.case_id,
+        **asdict(case),
+        'rows': len(final_df),
+        'stages': stages,
+        'wall_s': wall_s,
+        'peak_rss_mb': max((s['peak_rss_mb'] for s in stages.values()
+                            if s['peak_rss_mb'] is not None), default=None),
+        'throughput_students_s': len(final_df) / wall_s
+    }
+
+
+def run_suite(specs: List[GradebookSpec], modes: List[str],
+              data_root: Optional[Path] = None) -> dict:
+    context = multiprocessing.get_context('spawn')
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        data_root = Path(data_root) if data_root else Path(workdir) / "data"
+        for spec in specs:
+            data_dir = prepare_gradebook(spec, data_root)
+            for mode in modes:
+                case = BenchmarkCase(spec.students, mode)
+                logger.info(f"Running {case.case_id}...")
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    result = pool.submit(run_case, case, str(data_dir), workdir).result()
+                logger.info(f"  {result['wall_s']:.2f}s, "
+                           f"{result['throughput_students_s']:.0f} students/s, "
+                           f"peak RSS {result['peak_rss_mb']} MB")
+                results.append(result)
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'cpu_count': os.cpu_count()
+        },
+        'gradebook': {key: value for key, value in asdict(specs[0]).items()
+                      if key != 'students'},
+        'results': results
+    }
+
+
+def _metrics(result: dict) -> Dict[str, Optional[float]]:
+    metrics = {'wall_s': result['wall_s'], 'peak_rss_mb': result['peak_rss_mb']}
+    for name, stage in result['stages'].items():
+        metrics[f"{name}.wall_s"] = stage['wall_s']
+        metrics[f"{name}.peak_rss_mb"] = stage['peak_rss_mb']
+    return metrics
+
+
+def find_regressions(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Case metrics that grew by more than ``tolerance`` (a fraction).
+
+    Totals and every stage's time and peak memory are compared. Stages
+    under 50 ms or 1 MB in the baseline are skipped as noise.
+    """
+    previous = {result['case']: result for result in baseline.get('results', [])}
+    regressions = []
+    for result in current['results']:
+        reference = previous.get(result['case'])
+        if reference is None:
+            continue
+        reference_metrics = _metrics(reference)
+        for metric, value in _metrics(result).items():
+            before = reference_metrics.get(metric)
+            floor = 0.05 if metric.endswith('_s') else 1.0
+            if value is None or before is None or before < floor:
+                continue
+            change = value / before - 1
+            if change > tolerance:
+                regressions.append(f"{result['case']}: {metric} {before:.2f} → "
+                                   f"{value:.2f} (+{change*100:.0f}%)")
+    return regressions
+
+
+def print_report(report: dict, regressions: Optional[List[str]]) -> None:
+    short = {'load_and_prepare_data': 'Load', 'merge_data_efficiently': 'Merge',
+             'calculate_final_grades': 'Compute', 'export_results': 'Export'}
+    print("\n" + "="*84)
+    print("GRADE PIPELINE BENCHMARK")
+    print("="*84)
+    print(f"{'Case':<22} " + " ".join(f"{short[s]:>9}" for s in STAGES)
+          + f" {'Wall (s)':>9} {'Students/s':>11} {'Peak (MB)':>10}")
+    for result in report['results']:
+        rss = result['peak_rss_mb']
+        print(f"{result['case']:<22} "
+              + " ".join(f"{result['stages'][s]['wall_s']:>9.2f}" for s in STAGES)
+              + f" {result['wall_s']:>9.2f} {result['throughput_students_s']:>11.0f} "
+              f"{'n/a' if rss is None else f'{rss:.0f}':>10}")
+    if regressions is not None:
+        print(f"\nRegressions: {len(regressions)}")
+        for line in regressions:
+            print(f"  {line}")
+    print("="*84 + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the grade pipeline stages on synthetic gradebooks.")
+    parser.add_argument('--students', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help="Roster sizes to generate (default: 1000 10000 100000)")
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES),
+                        help="Pipeline configurations to sweep")
+    parser.add_argument('--seed', type=int, default=0, help="Generator seed (default: 0)")
+    parser.add_argument('--groups', type=int, default=20, help="Groups in the roster (default: 20)")
+    parser.add_argument('--missing-rate', type=float, default=0.02,
+                        help="Share of students absent from each grade file (default: 0.02)")
+    parser.add_argument('--bad-id-rate', type=float, default=0.005,
+                        help="Share of grade rows with an unknown SID (default: 0.005)")
+    parser.add_argument('--out-of-range-rate', type=float, default=0.005,
+                        help="Share of grades outside their range (default: 0.005)")
+    parser.add_argument('--data-dir', type=Path,
+                        help="Keep generated gradebooks here and reuse them across runs")
+    parser.add_argument('--generate-only', action='store_true',
+                        help="Write the gradebooks to --data-dir and exit")
+    parser.add_argument('--output', type=Path, default=Path("benchmark_results.json"),
+                        help="Results file (default: benchmark_results.json)")
+    parser.add_argument('--baseline', type=Path,
+                        help="Stored results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed relative slowdown before flagging (default: 0.2)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Also write the results to --baseline")
+    args = parser.parse_args(argv)
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline requires --baseline")
+
+    specs = [
+        GradebookSpec(students, seed=args.seed, groups=args.groups,
+                      missing_rate=args.missing_rate, bad_id_rate=args.bad_id_rate,
+                      out_of_range_rate=args.out_of_range_rate)
+        for students in args.students
+    ]
+    if args.generate_only:
+        if not args.data_dir:
+            parser.error("--generate-only needs --data-dir")
+        for spec in specs:
+            prepare_gradebook(spec, args.data_dir)
+        return 0
+
+    report = run_suite(specs, args.modes, args.data_dir)
+
+    regressions = None
+    if args.baseline and args.baseline.exists() and not args.save_baseline:
+        regressions = find_regressions(report, json.loads(args.baseline.read_text()),
+                                       args.tolerance)
+        report['regressions'] = regressions
+
+    args.output.write_text(json.dumps(report, indent=2))
+    logger.info(f"Results saved: {args.output}")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        logger.info(f"Baseline saved: {args.baseline}")
+
+    print_report(report, regressions)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
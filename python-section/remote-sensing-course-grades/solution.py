@@ -1,10 +1,22 @@
+import numpy as np
 import pandas as pd
+import argparse
+import contextlib
+import hashlib
 import json
 import logging
+import os
+import re
+import shutil
+import time
+import tracemalloc
 from pathlib import Path
-from typing import Dict, List, Tuple
+from itertools import chain
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import sys
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, fields
+from pandas.api.types import union_categoricals
 
 # Configure logging
 logging.basicConfig(
@@ -28,11 +40,136 @@ class GradeConfig:
     weight_exam: float = 0.65
     base_dir: Path = Path("python-section/remote-sensing-course-grades/assets")
     output_file: str = "final_grades.xlsx"
+    join_engine: str = "coded"  # "coded" (shared integer ID codes) or "pandas" (hash merges)
+    streaming: bool = False  # Read only the needed CSV columns, converting and validating per chunk
+    chunk_rows: int = 100_000  # Rows per CSV chunk in streaming mode
+    csv_engine: str = "c"  # "c" (chunked reads) or "pyarrow" (multithreaded, one read per file)
+    cache_dir: Optional[Path] = None  # Parsed-input cache directory (disabled when unset)
+    cache_max_mb: float = 512.0  # Size bound of the input cache, evicted least recently used
+    state_file: Optional[Path] = None  # Previous run's final grades (.parquet); enables incremental runs
+    export_format: str = "xlsx"  # "xlsx" (one sheet per group), "csv" or "parquet" (one file per group)
+    export_workers: int = 1  # Threads writing csv/parquet group files
+    validation_report: Optional[Path] = None  # JSON report of input validation (not written when unset)
+    run_report: Optional[Path] = None  # JSON report of per-stage timings (not written when unset)
+    trace_memory: bool = False  # Record per-stage allocation peaks with tracemalloc (slows parsing)
+    deep_memory: bool = False  # Measure frame sizes with memory_usage(deep=True), a full scan
     
     def __post_init__(self):
         total_weight = self.weight_homework + self.weight_quiz + self.weight_exam
         if abs(total_weight - 1.0) > 1e-10:
             raise ValueError(f"Grade weights must sum to 1.0, got {total_weight}")
+        if self.join_engine not in ("coded", "pandas"):
+            raise ValueError(f"Unknown join engine '{self.join_engine}' "
+                             f"(expected 'coded' or 'pandas')")
+        if self.chunk_rows <= 0:
+            raise ValueError("Chunk size must be positive")
+        if self.csv_engine not in ("c", "pyarrow"):
+            raise ValueError(f"Unknown CSV engine '{self.csv_engine}' (expected 'c' or 'pyarrow')")
+        if self.cache_max_mb <= 0:
+            raise ValueError("Cache size bound must be positive")
+        if self.export_format not in ("xlsx", "csv", "parquet"):
+            raise ValueError(f"Unknown export format '{self.export_format}' "
+                             f"(expected 'xlsx', 'csv' or 'parquet')")
+        if self.export_workers < 1:
+            raise ValueError("Export worker count must be at least 1")
+
+
+class StageInstrumentation:
+    """
+    Totals per grade-pipeline stage: calls, rows in and out, wall and CPU time.
+    
+    Stages are named by step (load, normalize, convert, validate, ...) rather
+    than by method, and one name is entered once per source file or CSV
+    chunk. Each call's record is passed to ``hook`` as it closes and then
+    summed into ``stages[name]``: ``calls`` counts the entries and the row
+    and time figures add up, while ``peak_mb`` keeps the largest call's
+    value. With ``trace_memory``, a stage's ``peak_mb`` is measured from its
+    own start, so merge or export is not charged for the frames that the
+    load stages still hold.
+    
+    The class mirrors the raster script's instrumentation; each task is a
+    standalone script, so the code is not shared between them.
+    """
+    
+    def __init__(self, trace_memory: bool = False,
+                 hook: Optional[Callable[[str, dict], None]] = None):
+        self.trace_memory = trace_memory
+        self.hook = hook
+        self.stages = {}
+        self.peak_bytes = 0
+        self._open: List[list] = []  # [traced bytes at start, running peak] per active stage
+    
+    def _start_tracer(self) -> bool:
+        if not self.trace_memory or tracemalloc.is_tracing():
+            return False
+        tracemalloc.start()
+        return True
+    
+    def _fold_peak(self) -> None:
+        """Record the tracer's peak before it is reset for another stage."""
+        _, peak = tracemalloc.get_traced_memory()
+        self.peak_bytes = max(self.peak_bytes, peak)
+        if self._open:
+            self._open[-1][1] = max(self._open[-1][1], peak)
+    
+    @contextlib.contextmanager
+    def session(self):
+        """Trace a whole ``process`` run, so frames kept between stages count toward the peak."""
+        started = self._start_tracer()
+        try:
+            yield self
+        finally:
+            if started:
+                self._fold_peak()
+                tracemalloc.stop()
+    
+    @contextlib.contextmanager
+    def stage(self, name: str, rows_in: int = 0):
+        """Time a stage; the caller may set ``rows_out`` (and more) on the yielded record."""
+        started_tracer = self._start_tracer()
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            self._fold_peak()
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            self._open.append([current, current])
+        
+        record = {'calls': 1, 'rows_in': rows_in, 'rows_out': 0}
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_s'] = time.perf_counter() - wall_started
+            record['cpu_s'] = time.process_time() - cpu_started
+            if tracing:
+                self._fold_peak()
+                start_bytes, peak = self._open.pop()
+                current, _ = tracemalloc.get_traced_memory()
+                record['allocated_mb'] = (current - start_bytes) / (1024**2)
+                record['peak_mb'] = (peak - start_bytes) / (1024**2)
+                if self._open:
+                    self._open[-1][1] = max(self._open[-1][1], peak)
+            if started_tracer:
+                tracemalloc.stop()
+            
+            self._add(name, record)
+            if self.hook is not None:
+                self.hook(name, record)
+    
+    def _add(self, name: str, record: dict) -> None:
+        total = self.stages.setdefault(name, {})
+        for key, value in record.items():
+            previous = total.get(key, 0)
+            total[key] = max(previous, value) if key == 'peak_mb' else previous + value
+    
+    @property
+    def peak_mb(self) -> Optional[float]:
+        if not self.trace_memory:
+            return None
+        if tracemalloc.is_tracing():
+            self._fold_peak()
+        return self.peak_bytes / (1024**2)
 
 
 class DataValidator:    
@@ -77,11 +214,606 @@ class DataValidator:
         return missing
 
 
+class ValidationEngine:
+    """
+    Null, numeric-conversion, range and duplicate checks in one vectorized pass.
+    
+    Grade columns are converted once and stacked into a float64 block, so
+    each rule is a single mask over every column at once rather than a
+    filtered frame per column. The report is plain JSON-serializable data:
+    per column and rule a count plus sample offending IDs, and the same for
+    duplicate IDs. ``log_report`` emits the warnings ``DataValidator`` would.
+    """
+    
+    RULES = ("nulls", "failed_conversion", "out_of_range")
+    
+    def __init__(self, sample_size: int = 5):
+        if sample_size < 0:
+            raise ValueError("Sample size must be non-negative")
+        self.sample_size = sample_size
+    
+    def _samples(self, series: pd.Series, mask: np.ndarray) -> list:
+        rows = np.flatnonzero(mask)[:self.sample_size]
+        return series.iloc[rows].astype(str).tolist()
+    
+    def validate(self, df: pd.DataFrame, id_col: str, columns: List[str],
+                 ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+                 duplicates: bool = True) -> dict:
+        """Convert ``columns`` of ``df`` to numbers in place and report every rule violation."""
+        values, missing = self.convert(df, columns)
+        return self.check(df, id_col, columns, values, missing, ranges, duplicates)
+    
+    @staticmethod
+    def convert(df: pd.DataFrame, columns: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Convert ``columns`` to numbers in place; the float64 block and its missing-before mask."""
+        values = np.empty((len(df), len(columns)), dtype=np.float64, order='F')
+        missing = np.empty(values.shape, dtype=bool, order='F')
+        for j, col in enumerate(columns):
+            missing[:, j] = df[col].isna().to_numpy()
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+            values[:, j] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        return values, missing
+    
+    def check(self, df: pd.DataFrame, id_col: str, columns: List[str], values: np.ndarray,
+              missing: np.ndarray, ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+              duplicates: bool = True) -> dict:
+        """Report on a block from ``convert``, with offending IDs taken from ``df``."""
+        ranges = ranges or {}
+        lower = np.array([ranges[c][0] if c in ranges else -np.inf for c in columns])
+        upper = np.array([ranges[c][1] if c in ranges else np.inf for c in columns])
+        nulls = np.isnan(values)
+        masks = {
+            "nulls": nulls,
+            "failed_conversion": nulls & ~missing,
+            "out_of_range": (values < lower) | (values > upper)
+        }
+        counts = {rule: mask.sum(axis=0) for rule, mask in masks.items()}
+        
+        report = {'rows': len(df), 'id_column': id_col, 'columns': {}, 'duplicates': None}
+        for j, col in enumerate(columns):
+            entry = {'range': list(ranges[col]) if col in ranges else None}
+            for rule, mask in masks.items():
+                count = int(counts[rule][j])
+                entry[rule] = {
+                    'count': count,
+                    'sample_ids': self._samples(df[id_col], mask[:, j]) if count else []
+                }
+            rows = (np.flatnonzero(masks["out_of_range"][:, j])[:self.sample_size]
+                    if entry["out_of_range"]['count'] else [])
+            entry["out_of_range"]['sample_values'] = df[col].iloc[rows].tolist()
+            report['columns'][col] = entry
+        
+        if duplicates:
+            report['duplicates'] = self.duplicates(df[id_col])
+        return report
+    
+    def duplicates(self, ids: pd.Series) -> dict:
+        """Repeated IDs, counting every occurrence after the first like ``Series.duplicated``."""
+        codes, _ = pd.factorize(ids, use_na_sentinel=False)
+        # Codes are numbered in order of appearance, so a first occurrence
+        # is exactly a new running maximum
+        repeated = np.ones(len(codes), dtype=bool)
+        if len(codes):
+            repeated[0] = False
+            repeated[1:] = codes[1:] <= np.maximum.accumulate(codes)[:-1]
+        count = int(repeated.sum())
+        return {
+            'column': ids.name,
+            'count': count,
+            'sample_ids': self._samples(ids, repeated) if count else []
+        }
+    
+    def merge(self, reports: List[dict]) -> dict:
+        """One report for consecutive row blocks validated with the same columns."""
+        def combine(entries: List[dict]) -> dict:
+            combined = {'count': sum(entry['count'] for entry in entries)}
+            for key in entries[0]:
+                if key != 'count':
+                    combined[key] = [v for entry in entries for v in entry[key]][:self.sample_size]
+            return combined
+        
+        first = reports[0]
+        merged = {'rows': sum(report['rows'] for report in reports),
+                  'id_column': first['id_column'], 'columns': {}, 'duplicates': None}
+        for col, entry in first['columns'].items():
+            merged['columns'][col] = {'range': entry['range']}
+            for rule in self.RULES:
+                merged['columns'][col][rule] = combine([r['columns'][col][rule] for r in reports])
+        if first['duplicates'] is not None:
+            merged['duplicates'] = combine([report['duplicates'] for report in reports])
+            merged['duplicates']['column'] = first['duplicates']['column']
+        return merged
+    
+    @staticmethod
+    def log_report(report: dict, labels: Optional[Dict[str, str]] = None) -> None:
+        labels = labels or {}
+        duplicates = report['duplicates']
+        if duplicates and duplicates['count'] > 0:
+            logger.error(f"Found {duplicates['count']} duplicate {duplicates['column']}s: "
+                         f"{duplicates['sample_ids']}")
+        for col, entry in report['columns'].items():
+            failed = entry["failed_conversion"]['count']
+            if failed > 0:
+                logger.warning(f"{labels.get(col, col)}: {failed} values failed numeric conversion")
+            out_of_range = entry["out_of_range"]
+            if out_of_range['count'] > 0:
+                min_val, max_val = entry['range']
+                logger.warning(f"{col}: {out_of_range['count']} values out of range "
+                               f"[{min_val}, {max_val}]. "
+                               f"Examples: {out_of_range['sample_values'][:3]}")
+
+
+class StudentRoster:
+    """
+    Incremental reader for the doubly encoded ``students.json``.
+    
+    The file holds one JSON string whose content is the array of student
+    records. The outer string is unescaped a block at a time, cut after a
+    ``}`` so that no escape sequence is split, and whole records are decoded
+    from the inner text as they arrive. Each block's records become a small
+    frame whose repetitive string fields are categorized right away, and the
+    blocks are joined per column at the end. Memory follows the output
+    columns rather than the file, its decoded text and every record dict.
+    The result equals ``pd.DataFrame(records)`` with string columns under
+    ``CATEGORY_RATIO`` distinct values per row made categorical.
+    """
+    
+    BLOCK_CHARS = 1 << 20  # Characters of the file unescaped per step
+    CATEGORY_RATIO = 0.5
+    _WHITESPACE = re.compile(r'[ \t\n\r]*')
+    
+    @classmethod
+    def _inner_blocks(cls, f) -> Iterator[str]:
+        """Content of the outer JSON string, unescaped in blocks that end on a ``}``."""
+        head = f.read(cls.BLOCK_CHARS)
+        buffer = head.lstrip()
+        if not buffer.startswith('"'):
+            value = json.loads(head + f.read())
+            raise ValueError(f"Expected stringified JSON array, got {type(value).__name__}")
+        
+        buffer = buffer[1:]
+        for block in iter(lambda: f.read(cls.BLOCK_CHARS), ""):
+            buffer += block
+            cut = buffer.rfind('}') + 1
+            if cut:
+                yield json.loads('"' + buffer[:cut] + '"')
+                buffer = buffer[cut:]
+        
+        buffer = buffer.rstrip()
+        body = buffer[:-1]
+        if not buffer.endswith('"') or (len(body) - len(body.rstrip('\\'))) % 2:
+            raise ValueError("Unterminated JSON string in students file")
+        yield json.loads('"' + body + '"')
+    
+    @classmethod
+    def batches(cls, f) -> Iterator[List[dict]]:
+        """Student records, one list per unescaped block."""
+        decoder = json.JSONDecoder()
+        buffer, pos, expect = "", 0, "["
+        for block in chain(cls._inner_blocks(f), [None]):
+            if block is not None:
+                buffer, pos = buffer[pos:] + block, 0
+            records, whole = [], True
+            while True:
+                pos = cls._WHITESPACE.match(buffer, pos).end()
+                if pos == len(buffer):
+                    break
+                char = buffer[pos]
+                if expect == "[":
+                    if char != "[":
+                        raise ValueError("Expected stringified JSON array of student records")
+                    pos, expect = pos + 1, "first"
+                elif expect in ("first", "next") and char == "]":
+                    pos, expect = pos + 1, "end"
+                elif expect == "next":
+                    if char != ",":
+                        raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+                    pos, expect = pos + 1, "record"
+                elif expect in ("first", "record"):
+                    decoded = None
+                    if whole:
+                        # A block usually ends on a record boundary, so all its records
+                        # decode in one call; the last block also closes the array
+                        whole = False
+                        rest = buffer[pos:].rstrip()
+                        closed = rest.endswith("]")
+                        with contextlib.suppress(json.JSONDecodeError):
+                            decoded = json.loads("[" + rest + ("" if closed else "]")) or None
+                        if decoded:
+                            pos = len(buffer)
+                    if decoded is None:
+                        closed = False
+                        try:
+                            record, pos = decoder.raw_decode(buffer, pos)
+                        except json.JSONDecodeError:
+                            if block is None:
+                                raise
+                            break  # the record continues in the next block
+                        decoded = [record]
+                    for record in decoded:
+                        if not isinstance(record, dict):
+                            raise ValueError(f"Expected student records, got {type(record).__name__}")
+                    records.extend(decoded)
+                    expect = "end" if closed else "next"
+                else:
+                    raise json.JSONDecodeError("Extra data", buffer, pos)
+            if records:
+                yield records
+        
+        if expect != "end":
+            raise ValueError("Unterminated JSON array in students file")
+    
+    @staticmethod
+    def _is_text(series: pd.Series) -> bool:
+        return series.dtype == object or isinstance(series.dtype, pd.StringDtype)
+    
+    @classmethod
+    def _combine(cls, parts: List[pd.Series], rows: int) -> pd.Series:
+        """One column from its per-block pieces, typed as a single frame would type it."""
+        complete = sum(len(part) for part in parts) == rows
+        if complete and all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            column = pd.Series(union_categoricals([part.array for part in parts],
+                                                  sort_categories=True), name=parts[0].name)
+            if len(column.cat.categories) < cls.CATEGORY_RATIO * rows:
+                return column
+            return column.astype(column.cat.categories.dtype)
+        
+        parts = [part.astype(part.cat.categories.dtype)
+                 if isinstance(part.dtype, pd.CategoricalDtype) else part for part in parts]
+        numeric = all(pd.api.types.is_numeric_dtype(part) and not pd.api.types.is_bool_dtype(part)
+                      for part in parts)
+        if complete and (numeric or len({part.dtype for part in parts}) == 1):
+            column = pd.concat(parts, ignore_index=True)
+        else:
+            # Fields missing from some records, or typed differently per block
+            column = pd.concat([part.astype(object) for part in parts])
+            column = column.reindex(pd.RangeIndex(rows)).infer_objects()
+        
+        if cls._is_text(column) and column.nunique() < cls.CATEGORY_RATIO * rows:
+            column = column.astype('category')
+        return column
+    
+    @classmethod
+    def read(cls, filepath: Path) -> pd.DataFrame:
+        pieces: Dict[str, List[pd.Series]] = {}
+        rows = 0
+        with open(filepath, "r") as f:
+            for records in cls.batches(f):
+                batch = pd.DataFrame(records, index=pd.RangeIndex(rows, rows + len(records)))
+                for col in batch.columns:
+                    values = batch[col]
+                    # Mixed-type object fields stay raw so the final column infers like one frame
+                    if (isinstance(values.dtype, pd.StringDtype)
+                            and values.nunique() < cls.CATEGORY_RATIO * len(values)):
+                        values = values.astype('category')
+                    pieces.setdefault(col, []).append(values)
+                rows += len(batch)
+        
+        return pd.DataFrame({col: cls._combine(parts, rows) for col, parts in pieces.items()},
+                            index=pd.RangeIndex(rows))
+
+
+class CodedJoin:
+    """
+    Row indexers for equi-joins on integer-coded keys.
+    
+    Keys from every table are factorized together once, so each join is a
+    counting sort of the right-hand codes instead of a string hash table.
+    Indexers use -1 for "no match" and follow pandas merge row order: left
+    rows in order, and each left row's matches in right-table order.
+    """
+    
+    @staticmethod
+    def factorize(*keys: pd.Series) -> Tuple[List[np.ndarray], int]:
+        """Shared integer codes for several key columns; missing keys match each other."""
+        codes, uniques = pd.concat(keys, ignore_index=True).factorize(use_na_sentinel=False)
+        bounds = np.cumsum([0] + [len(key) for key in keys])
+        return [codes[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])], len(uniques)
+    
+    @staticmethod
+    def left(left_codes: np.ndarray, right_codes: np.ndarray,
+             n_codes: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Left-join indexers: every left row once per right match, or once with -1."""
+        order = np.argsort(right_codes, kind='stable')
+        counts = np.bincount(right_codes, minlength=n_codes)
+        starts = np.cumsum(counts) - counts
+        
+        matches = counts[left_codes]
+        repeats = np.maximum(matches, 1)
+        left_index = np.repeat(np.arange(len(left_codes)), repeats)
+        
+        first_row = np.cumsum(repeats) - repeats
+        offsets = np.arange(len(left_index)) - np.repeat(first_row, repeats)
+        matched = np.repeat(matches > 0, repeats)
+        right_index = np.full(len(left_index), -1, dtype=np.intp)
+        right_index[matched] = order[(np.repeat(starts[left_codes], repeats) + offsets)[matched]]
+        return left_index, right_index
+    
+    @staticmethod
+    def outer(left_codes: np.ndarray, right_codes: np.ndarray,
+              n_codes: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Outer-join indexers plus the key code of every result row."""
+        left_index, right_index = CodedJoin.left(left_codes, right_codes, n_codes)
+        in_left = np.zeros(n_codes, dtype=bool)
+        in_left[left_codes] = True
+        right_only = np.flatnonzero(~in_left[right_codes])
+        
+        codes = np.concatenate([left_codes[left_index], right_codes[right_only]])
+        left_index = np.concatenate([left_index, np.full(len(right_only), -1, dtype=np.intp)])
+        right_index = np.concatenate([right_index, right_only])
+        return left_index, right_index, codes
+    
+    @staticmethod
+    def take(series: pd.Series, index: np.ndarray) -> pd.Series:
+        """Rows of ``series`` at ``index``, missing where it is -1 (with merge's upcasting)."""
+        values = series.array
+        if isinstance(values, pd.arrays.NumpyExtensionArray):
+            values = pd.api.extensions.take(values.to_numpy(), index, allow_fill=True)
+        else:
+            values = values.take(index, allow_fill=True)
+        return pd.Series(values, name=series.name, copy=False)
+
+
+class InputCache:
+    """
+    On-disk cache of the four prepared input frames, stored as Parquet.
+    
+    An entry is a directory holding one file per frame and the validation
+    report of the run that filled it. Its name hashes the content of all
+    four source files together with the settings that change the frames or
+    the report, so editing any source or grade maximum misses. Entries are
+    judged by their directory mtime, which a hit refreshes: when the total
+    size passes ``max_bytes``, whole entries are removed oldest first.
+    """
+    
+    VERSION = 2
+    FRAMES = ("students", "hw_exam", "quiz1", "quiz2")
+    REPORT = "validation.json"
+    
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.evict()
+    
+    @staticmethod
+    def fingerprint(path: Path) -> dict:
+        if not path.exists():
+            raise FileNotFoundError(f"Required file not found: {path}")
+        
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        stat = path.stat()
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+    
+    @classmethod
+    def key(cls, sources: List[Path], fields: dict) -> str:
+        payload = json.dumps({
+            'version': cls.VERSION,
+            'sources': {path.name: cls.fingerprint(path) for path in sources},
+            **fields
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+    
+    @staticmethod
+    def _size(entry: Path) -> int:
+        return sum(f.stat().st_size for f in entry.iterdir())
+    
+    def load(self, key: str) -> Optional[Tuple[pd.DataFrame, ...]]:
+        entry = self.directory / key
+        if not entry.is_dir():
+            logger.info("Input cache miss")
+            return None
+        
+        os.utime(entry)
+        logger.info(f"Input cache hit: {key}")
+        return tuple(pd.read_parquet(entry / f"{name}.parquet") for name in self.FRAMES)
+    
+    def report(self, key: str) -> dict:
+        """Validation report of the run that filled the entry."""
+        return json.loads((self.directory / key / self.REPORT).read_text())
+    
+    def store(self, key: str, frames: Tuple[pd.DataFrame, ...], report: dict) -> None:
+        entry = self.directory / key
+        temporary = self.directory / f"{key}.tmp"
+        shutil.rmtree(temporary, ignore_errors=True)
+        temporary.mkdir()
+        for name, df in zip(self.FRAMES, frames):
+            df.to_parquet(temporary / f"{name}.parquet", index=False)
+        (temporary / self.REPORT).write_text(json.dumps(report))
+        
+        if self._size(temporary) > self.max_bytes:
+            logger.warning("Not caching inputs: entry exceeds the cache bound")
+            shutil.rmtree(temporary)
+            return
+        
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(temporary, entry)
+        self.evict(keep=entry)
+    
+    def evict(self, keep: Optional[Path] = None) -> None:
+        entries = sorted((e for e in self.directory.iterdir() if e.is_dir() and e.suffix != ".tmp"),
+                         key=lambda e: e.stat().st_mtime)
+        sizes = {entry: self._size(entry) for entry in entries}
+        total = sum(sizes.values())
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            total -= sizes[entry]
+            shutil.rmtree(entry)
+            logger.info(f"Input cache evicted: {entry.name}")
+
+
+class GradeState:
+    """
+    Final grades of the previous run, keyed by a hash of each merged row.
+    
+    A final-grade row depends only on its merged row, the merged column
+    layout and the grading config, so rows whose hash was seen before can
+    reuse their stored result. Layout, config and export target are saved
+    next to the grades (``<state>.json``); when any differs, the state is
+    ignored.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.meta_path = self.path.with_suffix('.json')
+    
+    @staticmethod
+    def fingerprint(config: GradeConfig, merged: pd.DataFrame) -> dict:
+        return {
+            'columns': [[str(col), str(dtype)] for col, dtype in merged.dtypes.items()],
+            'quiz_max': config.quiz_max,
+            'homework_max': config.homework_max,
+            'exam_max': config.exam_max,
+            'weights': [config.weight_homework, config.weight_quiz, config.weight_exam],
+            'output_file': str(config.output_file),
+            'export_format': config.export_format
+        }
+    
+    def load(self, fingerprint: dict) -> Optional[pd.DataFrame]:
+        if not self.path.exists() or not self.meta_path.exists():
+            logger.info("No previous grade state; computing all rows")
+            return None
+        if json.loads(self.meta_path.read_text()) != fingerprint:
+            logger.info("Grade state was built for other columns or settings; computing all rows")
+            return None
+        return pd.read_parquet(self.path)
+    
+    def save(self, final_df: pd.DataFrame, row_hashes: np.ndarray, fingerprint: dict) -> None:
+        final_df.assign(RowHash=row_hashes).to_parquet(self.path, index=False)
+        self.meta_path.write_text(json.dumps(fingerprint))
+        logger.info(f"Grade state saved: {self.path}")
+
+
+@dataclass
+class ScenarioResult:
+    grades: pd.DataFrame  # students × scenarios, rows aligned with the final grades
+    group_means: pd.DataFrame  # groups × scenarios
+    rank_changes: pd.DataFrame  # students × scenarios; positive means a better rank than now
+
+
+class WeightScenarios:
+    """
+    Final grades under many grading policies from one component matrix.
+    
+    Homework, quiz and exam averages are normalized to the 100-point scale
+    once, using the base config's maximum scores. A scenario's weights and
+    maximum scores fold into three coefficients, so K scenarios cost a
+    single (students × 3) @ (3 × K) product. Grades agree with a full
+    pipeline run per scenario up to floating-point rounding.
+    """
+    
+    def __init__(self, final_df: pd.DataFrame, config: GradeConfig):
+        exam_cols = [c for c in final_df.columns
+                     if ("Exam" in c or "Final" in c) and c != "FinalGrade"]
+        if not exam_cols:
+            raise ValueError("No exam column found")
+        
+        self.final_df = final_df
+        self.config = config
+        self.maxima = np.array([config.homework_max, config.quiz_max, config.exam_max],
+                               dtype=np.float64)
+        components = [final_df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                      for col in ("HomeworkAvg", "QuizAvg", exam_cols[0])]
+        self.matrix = np.column_stack(components) / self.maxima * 100
+    
+    def coefficients(self, configs: List[GradeConfig]) -> np.ndarray:
+        """Per-config multipliers of the normalized components (K × 3)."""
+        weights = np.array([[c.weight_homework, c.weight_quiz, c.weight_exam]
+                            for c in configs], dtype=np.float64)
+        maxima = np.array([[c.homework_max, c.quiz_max, c.exam_max]
+                           for c in configs], dtype=np.float64)
+        return weights * self.maxima / maxima
+    
+    def evaluate(self, scenarios: Dict[str, GradeConfig]) -> ScenarioResult:
+        if not scenarios:
+            raise ValueError("At least one scenario is required")
+        
+        logger.info(f"Evaluating {len(scenarios)} grading scenarios "
+                   f"for {len(self.final_df)} students")
+        # The base config rides along as the last row, so ranks are compared
+        # between grades rounded the same way
+        coefficients = self.coefficients(list(scenarios.values()) + [self.config])
+        products = coefficients @ self.matrix.T
+        ranks = self.descending_min_rank(products)
+        
+        grades = pd.DataFrame(products[:-1].T, index=self.final_df.index, columns=list(scenarios))
+        group_means = grades.groupby(self.final_df["Group"], observed=True).mean()
+        rank_changes = pd.DataFrame((ranks[-1] - ranks[:-1]).T, index=grades.index,
+                                    columns=list(scenarios))
+        
+        return ScenarioResult(grades, group_means, rank_changes)
+    
+    @staticmethod
+    def descending_min_rank(values: np.ndarray) -> np.ndarray:
+        """
+        Rank of each row's values, highest first, ties sharing the best rank.
+        
+        Matches ``DataFrame.rank(ascending=False, method="min")`` per row,
+        NaN included, but sorts finite keys only: NaN is mapped to +inf
+        first, which keeps numpy's much faster NaN-free sort.
+        """
+        ranks = np.empty_like(values)
+        positions = np.arange(values.shape[1], dtype=np.float64)
+        first = np.ones(values.shape[1], dtype=bool)
+        for row, rank in zip(values, ranks):
+            keys = np.negative(row)
+            missing = np.isnan(keys)
+            keys[missing] = np.inf
+            order = np.argsort(keys)
+            ordered = keys[order]
+            np.not_equal(ordered[1:], ordered[:-1], out=first[1:])
+            rank[order] = np.maximum.accumulate(np.where(first, positions, 0)) + 1
+            rank[missing] = np.nan
+        return ranks
+    
+    def print_summary(self, result: ScenarioResult) -> None:
+        print("\n" + "="*60)
+        print("GRADING SCENARIOS")
+        print("="*60)
+        print(f"{'Scenario':<20} {'Mean':>7} {'Median':>7} {'Moved':>7} {'Max move':>9}")
+        for name in result.grades.columns:
+            grades = result.grades[name]
+            changes = result.rank_changes[name]
+            moved = int((changes.fillna(0) != 0).sum())
+            largest = changes.abs().max() if moved else 0
+            print(f"{str(name)[:20]:<20} {grades.mean():>7.2f} {grades.median():>7.2f} "
+                  f"{moved:>7} {largest:>9.0f}")
+        print("="*60 + "\n")
+
+
 class GradeProcessor:
     
-    def __init__(self, config: GradeConfig):
+    SOURCE_FILES = ("Homework_and_exams.csv", "quiz_1_grades.csv",
+                    "quiz_2_grades.csv", "students.json")
+    # Column names the validation warnings use for each quiz file
+    SOURCE_LABELS = {"quiz_1_grades.csv": {"Grade": "Quiz1"},
+                     "quiz_2_grades.csv": {"Grade": "Quiz2"}}
+    
+    def __init__(self, config: GradeConfig,
+                 stage_hook: Optional[Callable[[str, dict], None]] = None):
         self.config = config
         self.validator = DataValidator()
+        self.validation = ValidationEngine()
+        self.validation_report: Dict[str, dict] = {}
+        self.instrumentation = StageInstrumentation(config.trace_memory, stage_hook)
+    
+    def _memory_note(self, df: pd.DataFrame) -> str:
+        """Deep frame size for log lines, measured only with ``deep_memory``."""
+        if not self.config.deep_memory:
+            return ""
+        return f", memory: {df.memory_usage(deep=True).sum() / 1024:.1f} KB"
+    
+    def _rows_out(self, record: dict, *frames: pd.DataFrame) -> None:
+        """Count a stage's output rows, plus their deep size with ``deep_memory``."""
+        record['rows_out'] += sum(len(df) for df in frames)
+        if self.config.deep_memory:
+            record['memory_mb'] = sum(df.memory_usage(deep=True).sum() for df in frames) / 1024**2
     
     def load_csv_with_types(self, filepath: Path, dtype_spec: Dict = None) -> pd.DataFrame:
         """Load CSV with optimized data types."""
@@ -92,7 +824,7 @@ class GradeProcessor:
         
         df = pd.read_csv(filepath, dtype=dtype_spec or {})
         
-        logger.info(f"Loaded {len(df)} rows, memory: {df.memory_usage(deep=True).sum() / 1024:.1f} KB")
+        logger.info(f"Loaded {len(df)} rows{self._memory_note(df)}")
         return df
     
     def load_students_json(self, filepath: Path) -> pd.DataFrame:
@@ -105,33 +837,21 @@ class GradeProcessor:
         
         logger.info(f"Loading {filepath.name}...")
         
-        with open(filepath, "r") as f:
-            json_string = json.load(f)
-            
-            if not isinstance(json_string, str):
-                raise ValueError(
-                    f"Expected stringified JSON array, got {type(json_string).__name__}"
-                )
-            
-            students_list = json.loads(json_string)
-        
-        df = pd.DataFrame(students_list)
-        
-        for col in df.select_dtypes(include=['object']).columns:
-            if df[col].nunique() / len(df) < 0.5: 
-                df[col] = df[col].astype('category')
+        df = StudentRoster.read(filepath)
         
         logger.info(f"Loaded {len(df)} students")
         return df
     
-    def normalize_ids(self, df: pd.DataFrame, col_name: str) -> pd.DataFrame:
+    def normalize_ids(self, df: pd.DataFrame, col_name: str,
+                      check_duplicates: bool = True) -> pd.DataFrame:
         """Normalize ID column to lowercase, trimmed strings."""
         if col_name not in df.columns:
             raise ValueError(f"Column '{col_name}' not found")
         
         df[col_name] = df[col_name].astype(str).str.lower().str.strip()
         
-        self.validator.check_duplicates(df, col_name)
+        if check_duplicates:
+            self.validator.check_duplicates(df, col_name)
         
         return df
     
@@ -144,48 +864,211 @@ class GradeProcessor:
         
         return numeric_series
     
-    def load_and_prepare_data(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-        hw_exam_df = self.load_csv_with_types(
-            self.config.base_dir / "Homework_and_exams.csv",
-            dtype_spec={'SID': 'string'}
-        )
+    def _read_chunks(self, filepath: Path, columns: List[str]):
+        """``SID`` plus ``columns`` of a CSV, as chunks (C engine) or one frame (pyarrow)."""
+        usecols = ["SID"] + columns
+        if self.config.csv_engine == "pyarrow":
+            # pyarrow cannot read in chunks, but only materializes the requested columns.
+            # SID is typed by pyarrow's own converter: pandas applies dtype= after
+            # parsing, when numeric-looking IDs have already lost their leading zeros
+            import pyarrow as pa
+            from pyarrow import csv as pa_csv
+            
+            df = pa_csv.read_csv(filepath, convert_options=pa_csv.ConvertOptions(
+                include_columns=usecols, column_types={'SID': pa.string()}
+            )).to_pandas()
+            df["SID"] = df["SID"].astype("string")
+            return [df]
+        return pd.read_csv(filepath, usecols=usecols, dtype={'SID': 'string'},
+                           chunksize=self.config.chunk_rows)
+    
+    def stream_csv(self, filepath: Path, grade_cols: List[str],
+                   ranges: Dict[str, Tuple[float, float]],
+                   labels: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """
+        Load ``SID`` and ``grade_cols`` chunk by chunk.
         
-        quiz1_df = self.load_csv_with_types(
-            self.config.base_dir / "quiz_1_grades.csv",
-            dtype_spec={'SID': 'string'}
-        )
+        Each chunk has its IDs normalized and its grade columns converted
+        and validated before the next one is parsed; the chunk reports are
+        merged and logged once per file, and duplicate IDs are checked over
+        the whole file. The file's report lands in ``validation_report``.
+        """
+        if not filepath.exists():
+            raise FileNotFoundError(f"Required file not found: {filepath}")
         
-        quiz2_df = self.load_csv_with_types(
-            self.config.base_dir / "quiz_2_grades.csv",
-            dtype_spec={'SID': 'string'}
-        )
+        logger.info(f"Streaming {filepath.name} ({len(grade_cols)} grade columns)...")
+        
+        stage = self.instrumentation.stage
+        chunks, reports = [], []
+        reader = iter(self._read_chunks(filepath, grade_cols))
+        while True:
+            with stage('load') as record:
+                chunk = next(reader, None)
+                if chunk is not None:
+                    record['rows_out'] = len(chunk)
+            if chunk is None:
+                break
+            with stage('normalize', len(chunk)) as record:
+                chunk["SID"] = chunk["SID"].astype(str).str.lower().str.strip()
+                record['rows_out'] = len(chunk)
+            with stage('convert', len(chunk)) as record:
+                values, missing = self.validation.convert(chunk, grade_cols)
+                record['rows_out'] = len(chunk)
+            with stage('validate', len(chunk)) as record:
+                reports.append(self.validation.check(chunk, "SID", grade_cols, values, missing,
+                                                     ranges, duplicates=False))
+                record['rows_out'] = len(chunk)
+            chunks.append(chunk)
         
-        students = self.load_students_json(
-            self.config.base_dir / "students.json"
+        # Whole-file steps count time but not rows, which the chunks already counted
+        with stage('load'):
+            if chunks:
+                df = pd.concat(chunks, ignore_index=True)
+            else:
+                df = pd.DataFrame({col: pd.Series(dtype='float64') for col in ["SID"] + grade_cols})
+                df["SID"] = df["SID"].astype(str)
+                reports.append(self.validation.validate(df, "SID", grade_cols, ranges,
+                                                        duplicates=False))
+        
+        with stage('validate'):
+            report = self.validation.merge(reports)
+            report['duplicates'] = self.validation.duplicates(df["SID"])
+        self.validation.log_report(report, labels)
+        self.validation_report[filepath.name] = report
+        
+        logger.info(f"Loaded {len(df)} rows in {max(1, len(chunks))} chunks{self._memory_note(df)}")
+        return df
+    
+    def load_streaming(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """Streaming counterpart of ``load_and_prepare_data``, without unused columns."""
+        hw_path = self.config.base_dir / "Homework_and_exams.csv"
+        if not hw_path.exists():
+            raise FileNotFoundError(f"Required file not found: {hw_path}")
+        
+        # Submission timestamps match the grade keywords but never convert to numbers
+        header = pd.read_csv(hw_path, nrows=0).columns
+        grade_cols = [c for c in header
+                      if any(kw in c for kw in ["Homework", "Exam", "Final"])
+                      and "Submission Time" not in c]
+        hw_exam_df = self.stream_csv(
+            hw_path, grade_cols,
+            {c: (0, self.config.homework_max) for c in grade_cols if "Homework" in c}
         )
         
-        students = self.normalize_ids(students, "NetID")
-        hw_exam_df = self.normalize_ids(hw_exam_df, "SID")
-        quiz1_df = self.normalize_ids(quiz1_df, "SID")
-        quiz2_df = self.normalize_ids(quiz2_df, "SID")
+        quiz_range = {"Grade": (0, self.config.quiz_max)}
+        quiz1_df = self.stream_csv(self.config.base_dir / "quiz_1_grades.csv", ["Grade"],
+                                   quiz_range, self.SOURCE_LABELS["quiz_1_grades.csv"])
+        quiz2_df = self.stream_csv(self.config.base_dir / "quiz_2_grades.csv", ["Grade"],
+                                   quiz_range, self.SOURCE_LABELS["quiz_2_grades.csv"])
+        
+        with self.instrumentation.stage('load') as record:
+            students = self.load_students_json(self.config.base_dir / "students.json")
+            self._rows_out(record, students)
+        with self.instrumentation.stage('normalize', len(students)) as record:
+            students = self.normalize_ids(students, "NetID", check_duplicates=False)
+            self._rows_out(record, students)
+        self._validate(students, "students.json", "NetID")
+        
+        return students, hw_exam_df, quiz1_df, quiz2_df
+    
+    def load_and_prepare_data(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """Prepared students, homework/exam and quiz frames, from the cache when inputs are unchanged."""
+        frames = self._load_inputs()
+        if self.config.validation_report:
+            self.save_validation_report()
+        return frames
+    
+    def _load_inputs(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        if not self.config.cache_dir:
+            return self.prepare_inputs()
+        
+        with self.instrumentation.stage('cache') as record:
+            cache = InputCache(self.config.cache_dir, int(self.config.cache_max_mb * 1024**2))
+            key = InputCache.key(
+                [self.config.base_dir / name for name in self.SOURCE_FILES],
+                # The maxima set the validation ranges stored in the entry's report
+                {'streaming': self.config.streaming, 'csv_engine': self.config.csv_engine,
+                 'homework_max': self.config.homework_max, 'quiz_max': self.config.quiz_max}
+            )
+            frames = cache.load(key)
+            if frames is not None:
+                self.validation_report = cache.report(key)
+                self._rows_out(record, *frames)
+        if frames is not None:
+            for source, report in self.validation_report.items():
+                self.validation.log_report(report, self.SOURCE_LABELS.get(source))
+        if frames is None:
+            frames = self.prepare_inputs()
+            with self.instrumentation.stage('cache'):
+                cache.store(key, frames, self.validation_report)
+        return frames
+    
+    def prepare_inputs(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        if self.config.streaming:
+            return self.load_streaming()
+        
+        stage = self.instrumentation.stage
+        with stage('load') as record:
+            hw_exam_df = self.load_csv_with_types(
+                self.config.base_dir / "Homework_and_exams.csv",
+                dtype_spec={'SID': 'string'}
+            )
+            
+            quiz1_df = self.load_csv_with_types(
+                self.config.base_dir / "quiz_1_grades.csv",
+                dtype_spec={'SID': 'string'}
+            )
+            
+            quiz2_df = self.load_csv_with_types(
+                self.config.base_dir / "quiz_2_grades.csv",
+                dtype_spec={'SID': 'string'}
+            )
+            
+            students = self.load_students_json(
+                self.config.base_dir / "students.json"
+            )
+            self._rows_out(record, students, hw_exam_df, quiz1_df, quiz2_df)
+        
+        rows = len(students) + len(hw_exam_df) + len(quiz1_df) + len(quiz2_df)
+        with stage('normalize', rows) as record:
+            students = self.normalize_ids(students, "NetID", check_duplicates=False)
+            hw_exam_df = self.normalize_ids(hw_exam_df, "SID", check_duplicates=False)
+            quiz1_df = self.normalize_ids(quiz1_df, "SID", check_duplicates=False)
+            quiz2_df = self.normalize_ids(quiz2_df, "SID", check_duplicates=False)
+            self._rows_out(record, students, hw_exam_df, quiz1_df, quiz2_df)
         
         grade_keywords = ["Homework", "Exam", "Final"]
         grade_cols = [c for c in hw_exam_df.columns 
                      if any(kw in c for kw in grade_keywords)]
         
-        for col in grade_cols:
-            hw_exam_df[col] = self.convert_to_numeric_safe(hw_exam_df[col], col)
-            if "Homework" in col:
-                self.validator.validate_grade_range(hw_exam_df, col, 0, self.config.homework_max)
-        
-        quiz1_df["Grade"] = self.convert_to_numeric_safe(quiz1_df["Grade"], "Quiz1")
-        quiz2_df["Grade"] = self.convert_to_numeric_safe(quiz2_df["Grade"], "Quiz2")
-        
-        self.validator.validate_grade_range(quiz1_df, "Grade", 0, self.config.quiz_max)
-        self.validator.validate_grade_range(quiz2_df, "Grade", 0, self.config.quiz_max)
+        self._validate(students, "students.json", "NetID")
+        self._validate(hw_exam_df, "Homework_and_exams.csv", "SID", grade_cols,
+                       {c: (0, self.config.homework_max) for c in grade_cols if "Homework" in c})
+        quiz_range = {"Grade": (0, self.config.quiz_max)}
+        for df, source in ((quiz1_df, "quiz_1_grades.csv"), (quiz2_df, "quiz_2_grades.csv")):
+            self._validate(df, source, "SID", ["Grade"], quiz_range, self.SOURCE_LABELS[source])
         
         return students, hw_exam_df, quiz1_df, quiz2_df
     
+    def _validate(self, df: pd.DataFrame, source: str, id_col: str,
+                  columns: Optional[List[str]] = None,
+                  ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+                  labels: Optional[Dict[str, str]] = None) -> None:
+        columns = columns or []
+        with self.instrumentation.stage('convert', len(df)) as record:
+            values, missing = self.validation.convert(df, columns)
+            self._rows_out(record, df)
+        with self.instrumentation.stage('validate', len(df)) as record:
+            report = self.validation.check(df, id_col, columns, values, missing, ranges)
+            record['rows_out'] = len(df)
+        self.validation.log_report(report, labels)
+        self.validation_report[source] = report
+    
+    def save_validation_report(self) -> None:
+        path = Path(self.config.validation_report)
+        path.write_text(json.dumps(self.validation_report, indent=2))
+        logger.info(f"Validation report saved: {path}")
+    
     def merge_data_efficiently(self, students: pd.DataFrame, 
                               hw_exam_df: pd.DataFrame,
                               quiz1_df: pd.DataFrame, 
@@ -193,6 +1076,12 @@ class GradeProcessor:
         
         logger.info("Merging dataframes...")
         
+        if self.config.join_engine == "coded" and self._can_code_join(students, hw_exam_df,
+                                                                     quiz1_df, quiz2_df):
+            merged = self._coded_merge(students, hw_exam_df, quiz1_df, quiz2_df)
+            logger.info(f"Merged dataframe size: {len(merged)} rows{self._memory_note(merged)}")
+            return merged
+        
         quizzes = quiz1_df[["SID", "Grade"]].rename(columns={"Grade": "Quiz1"})
         quizzes = quizzes.merge(
             quiz2_df[["SID", "Grade"]].rename(columns={"Grade": "Quiz2"}),
@@ -210,11 +1099,51 @@ class GradeProcessor:
         if "SID" in merged.columns:
             merged = merged.drop(columns=["SID"])
         
-        logger.info(f"Merged dataframe size: {len(merged)} rows, "
-                   f"{merged.memory_usage(deep=True).sum() / 1024:.1f} KB")
+        logger.info(f"Merged dataframe size: {len(merged)} rows{self._memory_note(merged)}")
         
         return merged
     
+    @staticmethod
+    def _can_code_join(students: pd.DataFrame, hw_exam_df: pd.DataFrame,
+                       quiz1_df: pd.DataFrame, quiz2_df: pd.DataFrame) -> bool:
+        """Whether the merge needs none of pandas' suffixing or key-column rules."""
+        if "NetID" not in students.columns or "SID" in students.columns:
+            return False
+        if not all("SID" in df.columns and "Grade" in df.columns for df in (quiz1_df, quiz2_df)):
+            return False
+        if "SID" not in hw_exam_df.columns:
+            return False
+        
+        hw_cols = [c for c in hw_exam_df.columns if c != "SID"]
+        names = list(students.columns) + hw_cols + ["Quiz1", "Quiz2"]
+        return len(names) == len(set(names))
+    
+    def _coded_merge(self, students: pd.DataFrame, hw_exam_df: pd.DataFrame,
+                     quiz1_df: pd.DataFrame, quiz2_df: pd.DataFrame) -> pd.DataFrame:
+        """Same rows and columns as the pandas merges, assembled by integer indexers."""
+        (student_codes, hw_codes, quiz1_codes, quiz2_codes), n_codes = CodedJoin.factorize(
+            students["NetID"], hw_exam_df["SID"], quiz1_df["SID"], quiz2_df["SID"]
+        )
+        
+        quiz1_index, quiz2_index, quiz_codes = CodedJoin.outer(quiz1_codes, quiz2_codes, n_codes)
+        student_index, hw_index = CodedJoin.left(student_codes, hw_codes, n_codes)
+        row_index, quiz_index = CodedJoin.left(student_codes[student_index], quiz_codes, n_codes)
+        
+        student_rows = student_index[row_index]
+        hw_rows = hw_index[row_index]
+        
+        columns = {col: students[col].take(student_rows).reset_index(drop=True)
+                   for col in students.columns}
+        for col in hw_exam_df.columns:
+            if col != "SID":
+                columns[col] = CodedJoin.take(hw_exam_df[col], hw_rows)
+        # Quiz grades go through the outer-join rows first, which decides their upcasting
+        for name, quiz_df, index in (("Quiz1", quiz1_df, quiz1_index),
+                                     ("Quiz2", quiz2_df, quiz2_index)):
+            grades = CodedJoin.take(quiz_df["Grade"], index)
+            columns[name] = CodedJoin.take(grades, quiz_index).rename(name)
+        return pd.DataFrame(columns, copy=False)
+    
     def calculate_final_grades(self, df: pd.DataFrame) -> pd.DataFrame:
         
         logger.info("Calculating final grades...")
@@ -255,11 +1184,151 @@ class GradeProcessor:
                          "HomeworkAvg", "QuizAvg", exam_col]
         df = df[[c for c in essential_cols if c in df.columns]]
         
-        logger.info(f"Final dataframe memory: {df.memory_usage(deep=True).sum() / 1024:.1f} KB")
+        if self.config.deep_memory:
+            logger.info(f"Final dataframe memory: {df.memory_usage(deep=True).sum() / 1024:.1f} KB")
         
         return df
     
-    def export_results(self, df: pd.DataFrame) -> None:        
+    def update_final_grades(self, merged: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[list]]:
+        """
+        Final grades that only recompute rows not seen in the previous run.
+        
+        Also returns the groups whose rows were added, changed or removed,
+        or None when there was no usable state and every row was computed.
+        The new state is held back until ``save_state`` so that a failed
+        export does not mark its changes as done.
+        """
+        state = GradeState(self.config.state_file)
+        fingerprint = state.fingerprint(self.config, merged)
+        hashes = pd.util.hash_pandas_object(merged, index=False).to_numpy()
+        self._pending_state = (state, hashes, fingerprint)
+        
+        previous = state.load(fingerprint)
+        if previous is None:
+            return self.calculate_final_grades(merged), None
+        
+        previous_hashes = previous.pop("RowHash").to_numpy()
+        known, first_row = np.unique(previous_hashes, return_index=True)
+        positions = pd.Index(known).get_indexer(hashes)
+        new_rows = np.flatnonzero(positions < 0)
+        
+        recomputed = self.calculate_final_grades(merged.iloc[new_rows].reset_index(drop=True))
+        rows = first_row[np.maximum(positions, 0)]
+        rows[new_rows] = len(previous) + np.arange(len(new_rows))
+        final_df = pd.concat([previous, recomputed], ignore_index=True).take(rows)
+        final_df = final_df.reset_index(drop=True).astype(recomputed.dtypes.to_dict())
+        
+        # Rows whose count differs cover edits, additions, removals and duplicated rows alike
+        counts = pd.Series(hashes).value_counts()
+        counts = counts.sub(pd.Series(previous_hashes).value_counts(), fill_value=0)
+        changed = counts.index[counts != 0].to_numpy()
+        changed_now = np.isin(hashes, changed)
+        changed_before = np.isin(previous_hashes, changed)
+        groups = (set(final_df.loc[changed_now, "Group"].dropna())
+                  | set(previous.loc[changed_before, "Group"].dropna()))
+        students = set(final_df.loc[changed_now, "NetID"]) | set(previous.loc[changed_before, "NetID"])
+        
+        logger.info(f"Incremental update: {len(new_rows)} of {len(merged)} rows recomputed, "
+                   f"{len(students)} students and {len(groups)} groups changed")
+        return final_df, sorted(groups)
+    
+    def save_state(self, final_df: pd.DataFrame) -> None:
+        state, hashes, fingerprint = self._pending_state
+        state.save(final_df, hashes, fingerprint)
+    
+    @staticmethod
+    def partition_groups(output: pd.DataFrame) -> List[Tuple[object, pd.DataFrame]]:
+        """
+        Each group's rows sorted by final grade, in group order.
+        
+        Rows are partitioned by one stable sort of the group codes, so each
+        slice holds its rows in their original order and sorts exactly as a
+        boolean-mask selection of that group would.
+        """
+        codes, uniques = pd.factorize(output["Group"])
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        order = order[len(codes) - counts.sum():]  # ungrouped rows (-1) sort first
+        slices = np.split(order, np.cumsum(counts)[:-1]) if len(uniques) else []
+        
+        partitions = [
+            (uniques[i], output.iloc[slices[i]].sort_values("FinalGrade", ascending=False))
+            for i in range(len(uniques))
+        ]
+        return sorted(partitions, key=lambda partition: partition[0])
+    
+    @staticmethod
+    def _log_group(name: str, df_group: pd.DataFrame) -> None:
+        logger.info(f"  {name}: {len(df_group)} students, "
+                   f"avg grade: {df_group['FinalGrade'].mean():.2f}")
+    
+    @staticmethod
+    def _sheet_name(grp) -> str:
+        return f"Group_{grp}"[:31]  # Excel sheet name limit
+    
+    def _write_workbook(self, partitions: List[Tuple[object, pd.DataFrame]]) -> None:
+        """Stream every group sheet through openpyxl's write-only mode, one row at a time."""
+        from openpyxl import Workbook
+        
+        book = Workbook(write_only=True)
+        for grp, df_group in partitions:
+            sheet = book.create_sheet(self._sheet_name(grp))
+            sheet.append(list(df_group.columns))
+            columns = [df_group[col].astype(object).where(df_group[col].notna(), None).tolist()
+                       for col in df_group.columns]
+            for row in zip(*columns):
+                sheet.append(row)
+            self._log_group(self._sheet_name(grp), df_group)
+        book.save(self.config.output_file)
+    
+    def _group_dir(self) -> Path:
+        return Path(self.config.output_file).with_suffix("")
+    
+    @property
+    def export_target(self) -> Path:
+        """The workbook for xlsx exports, else the directory holding the group files."""
+        if self.config.export_format == "xlsx":
+            return Path(self.config.output_file)
+        return self._group_dir()
+    
+    def _write_group_files(self, partitions: List[Tuple[object, pd.DataFrame]]) -> None:
+        """One csv or parquet file per group, written concurrently."""
+        directory = self._group_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        extension = self.config.export_format
+        
+        def write(partition: Tuple[object, pd.DataFrame]) -> None:
+            grp, df_group = partition
+            path = directory / f"Group_{grp}.{extension}"
+            if extension == "csv":
+                df_group.to_csv(path, index=False)
+            else:
+                df_group.to_parquet(path, index=False)
+        
+        with ThreadPoolExecutor(max_workers=self.config.export_workers) as pool:
+            list(pool.map(write, partitions))
+        for grp, df_group in partitions:
+            self._log_group(f"Group_{grp}.{extension}", df_group)
+    
+    def _remove_group_files(self, keep: set, candidates: Optional[list] = None) -> None:
+        """Delete group files not in ``keep``; only among ``candidates`` when given."""
+        directory = self._group_dir()
+        extension = self.config.export_format
+        if candidates is None:
+            paths = directory.glob(f"Group_*.{extension}")
+        else:
+            paths = [directory / f"Group_{grp}.{extension}" for grp in candidates]
+        keep_names = {f"Group_{grp}.{extension}" for grp in keep}
+        for path in paths:
+            if path.name not in keep_names and path.exists():
+                path.unlink()
+                logger.info(f"  {path.name}: removed, no students left")
+    
+    def export_results(self, df: pd.DataFrame, groups: Optional[list] = None) -> int:
+        """Write each group's results; with ``groups``, only those groups of an existing export.
+        
+        Returns the number of rows written.
+        """
         output_cols = ["Name", "ID", "Group", "FinalGrade"]
         output = df[output_cols].copy()
         
@@ -268,23 +1337,42 @@ class GradeProcessor:
         if missing_group > 0:
             logger.warning(f"{missing_group} students missing group assignment")
         
-        groups = sorted(output["Group"].dropna().unique())
-        logger.info(f"Exporting {len(groups)} groups to {self.config.output_file}")
+        xlsx = self.config.export_format == "xlsx"
+        target = self.export_target
         
-        with pd.ExcelWriter(self.config.output_file, engine="openpyxl") as writer:
-            for grp in groups:
-                df_group = output[output["Group"] == grp].sort_values(
-                    "FinalGrade", 
-                    ascending=False
-                )
-                
-                sheet_name = f"Group_{grp}"[:31]  # Excel sheet name limit
-                df_group.to_excel(writer, sheet_name=sheet_name, index=False)
-                
-                logger.info(f"  {sheet_name}: {len(df_group)} students, "
-                           f"avg grade: {df_group['FinalGrade'].mean():.2f}")
+        partial = groups is not None and target.exists()
+        if partial and not groups:
+            logger.info(f"No group changed; {target} left as is")
+            return 0
+        if partial and xlsx:
+            # Sheets share the workbook's string table, so one cannot be swapped
+            # alone, and streaming every sheet is cheaper than loading and re-saving
+            logger.info(f"{len(groups)} groups changed; rewriting all of {target}")
+            partial = False
+        
+        if partial:
+            present = sorted(output["Group"].dropna().unique())
+            output = output[output["Group"].isin(groups)]
+            partitions = self.partition_groups(output)
+            logger.info(f"Rewriting {len(groups)} changed groups in {target}")
+            self._write_group_files(partitions)
+            self._remove_group_files(set(present), groups)
+        else:
+            partitions = self.partition_groups(output)
+            logger.info(f"Exporting {len(partitions)} groups to {target}")
+            if xlsx:
+                self._write_workbook(partitions)
+            else:
+                self._write_group_files(partitions)
+                self._remove_group_files({grp for grp, _ in partitions})
         
-        logger.info(f"Output saved to {self.config.output_file}")
+        logger.info(f"Output saved to {target}")
+        return len(output)
+    
+    def evaluate_scenarios(self, final_df: pd.DataFrame,
+                           scenarios: Dict[str, GradeConfig]) -> ScenarioResult:
+        """Final grades, group averages and rank changes under each scenario config."""
+        return WeightScenarios(final_df, self.config).evaluate(scenarios)
     
     def print_summary(self, df: pd.DataFrame) -> None:
         
@@ -301,30 +1389,227 @@ class GradeProcessor:
         print(f"  Min: {df['FinalGrade'].min():.2f}")
         print(f"  Max: {df['FinalGrade'].max():.2f}")
         print(f"\nGroups: {sorted(df['Group'].dropna().unique())}")
+        
+        stages = self.instrumentation.stages
+        if stages:
+            print(f"\nStages:")
+            print(f"  {'Stage':<10} {'Wall (s)':>8} {'CPU (s)':>8} {'Rows in':>10} "
+                  f"{'Rows out':>10} {'Peak (MB)':>10}")
+            for name, record in stages.items():
+                peak = record.get('peak_mb')
+                print(f"  {name:<10} {record['wall_s']:>8.3f} {record['cpu_s']:>8.3f} "
+                      f"{record['rows_in']:>10,} {record['rows_out']:>10,} "
+                      f"{'n/a' if peak is None else f'{peak:.1f}':>10}")
+            measured = self.instrumentation.peak_mb
+            print(f"  Measured peak: {'n/a' if measured is None else f'{measured:.1f} MB'}")
         print("="*60 + "\n")
     
-    def process(self) -> None:
+    def save_run_report(self, status: str, wall_s: float) -> None:
+        """Write per-stage timings, row counts and memory peaks to ``run_report``."""
+        report = {
+            'status': status,
+            'wall_s': wall_s,
+            'peak_mb': self.instrumentation.peak_mb,
+            'stages': self.instrumentation.stages,
+            'config': asdict(self.config),
+        }
+        path = Path(self.config.run_report)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2, default=str))
+        logger.info(f"Run report saved to {path}")
+    
+    def process(self) -> pd.DataFrame:
+        stage = self.instrumentation.stage
+        started = time.perf_counter()
+        status = "failed"
         try:
             logger.info("Starting grade processing pipeline...")
             
-            students, hw_exam_df, quiz1_df, quiz2_df = self.load_and_prepare_data()
-            
-            merged = self.merge_data_efficiently(students, hw_exam_df, quiz1_df, quiz2_df)
-            
-            final_df = self.calculate_final_grades(merged)
-            
-            self.export_results(final_df)
+            with self.instrumentation.session():
+                frames = self.load_and_prepare_data()
+                
+                with stage('merge', sum(len(df) for df in frames)) as record:
+                    merged = self.merge_data_efficiently(*frames)
+                    self._rows_out(record, merged)
+                
+                with stage('compute', len(merged)) as record:
+                    if self.config.state_file:
+                        final_df, changed_groups = self.update_final_grades(merged)
+                    else:
+                        final_df, changed_groups = self.calculate_final_grades(merged), None
+                    self._rows_out(record, final_df)
+                
+                with stage('export', len(final_df)) as record:
+                    record['rows_out'] = self.export_results(final_df, changed_groups)
+                    if self.config.state_file:
+                        self.save_state(final_df)
             
             self.print_summary(final_df)
             
             logger.info("Processing completed successfully!")
+            status = "completed"
+            
+            return final_df
             
         except Exception as e:
             logger.error(f"Processing failed: {e}", exc_info=True)
             raise
+        
+        finally:
+            if self.config.run_report:
+                self.save_run_report(status, time.perf_counter() - started)
+
+
+def _process_course(name: str, config: GradeConfig, log_path: Path) -> dict:
+    """Run one course in a pool worker, with its logs and printed summary in ``log_path``."""
+    root = logging.getLogger()
+    handler = logging.FileHandler(log_path, mode='w')
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    saved_handlers = root.handlers[:]
+    root.handlers[:] = [handler]
+    
+    result = {'course': name, 'output': None, 'log': str(log_path)}
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(handler.stream):
+            processor = GradeProcessor(config)
+            final_df = processor.process()
+        result.update(
+            status='ok',
+            output=str(processor.export_target),
+            students=len(final_df),
+            graded=int(final_df['FinalGrade'].notna().sum()),
+            mean_grade=float(final_df['FinalGrade'].mean())
+        )
+    except Exception as e:
+        result.update(status='failed', error=f"{type(e).__name__}: {e}")
+    finally:
+        root.handlers[:] = saved_handlers
+        handler.close()
+    
+    result['elapsed_s'] = time.perf_counter() - started
+    return result
+
+
+class CourseBatchRunner:
+    """
+    Processes many courses concurrently on a process pool.
+    
+    Each course runs with its own ``GradeConfig`` and writes its own log
+    file, and a failing course is recorded in the summary without affecting
+    the others. Workers stay alive across courses, so pandas and this module
+    are imported once per worker rather than once per course.
+    """
+    
+    PATH_FIELDS = ('base_dir', 'output_file', 'cache_dir', 'state_file', 'validation_report',
+                   'run_report')
+    
+    def __init__(self, courses: Dict[str, GradeConfig], output_dir: Path, workers: int = 1):
+        if workers < 1:
+            raise ValueError("Worker count must be at least 1")
+        self.courses = courses
+        self.output_dir = Path(output_dir)
+        self.workers = workers
+    
+    @classmethod
+    def load_manifest(cls, path: Path, output_dir: Path) -> Dict[str, GradeConfig]:
+        """
+        Read a JSON list of courses, each ``{"name": ..., "base_dir": ..., <GradeConfig fields>}``.
+        
+        Relative paths are resolved against the manifest's directory; a course
+        without ``output_file`` writes ``<output_dir>/<name>.xlsx``.
+        """
+        entries = json.loads(Path(path).read_text())
+        if not isinstance(entries, list):
+            raise ValueError(f"Expected a JSON list of courses in {path}")
+        
+        known = {f.name for f in fields(GradeConfig)}
+        courses = {}
+        for entry in entries:
+            entry = dict(entry)
+            if 'base_dir' not in entry:
+                raise ValueError(f"Course entry without base_dir in {path}: {entry}")
+            name = str(entry.pop('name', Path(entry['base_dir']).name))
+            if name in courses:
+                raise ValueError(f"Duplicate course name '{name}' in {path}")
+            unknown = set(entry) - known
+            if unknown:
+                raise ValueError(f"Course '{name}': unknown settings {sorted(unknown)}")
+            
+            entry.setdefault('output_file', Path(output_dir).resolve() / f"{name}.xlsx")
+            for key in cls.PATH_FIELDS:
+                if entry.get(key) is not None:
+                    entry[key] = Path(path).parent / entry[key]
+            entry['output_file'] = str(entry['output_file'])
+            courses[name] = GradeConfig(**entry)
+        return courses
+    
+    def run(self) -> List[dict]:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Processing {len(self.courses)} courses on {self.workers} workers")
+        
+        results = {}
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                pool.submit(_process_course, name, config, self.output_dir / f"{name}.log"): name
+                for name, config in self.courses.items()
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:  # the worker itself died
+                    result = {'course': name, 'output': None, 'status': 'failed',
+                              'error': f"{type(e).__name__}: {e}", 'elapsed_s': None}
+                results[name] = result
+                if result['status'] == 'ok':
+                    logger.info(f"  ✓ {name}: {result['students']} students "
+                               f"({result['elapsed_s']:.2f}s)")
+                else:
+                    logger.error(f"  ✗ {name}: {result['error']}")
+        
+        results = [results[name] for name in self.courses]
+        summary_path = self.output_dir / "batch_summary.json"
+        summary_path.write_text(json.dumps(results, indent=2))
+        logger.info(f"Batch summary saved: {summary_path}")
+        return results
+    
+    def print_summary(self, results: List[dict]) -> None:
+        failed = [result for result in results if result['status'] != 'ok']
+        print("\n" + "="*60)
+        print("COURSE BATCH SUMMARY")
+        print("="*60)
+        print(f"{'Course':<24} {'Status':<8} {'Students':>9} {'Mean':>7} {'Time (s)':>9}")
+        for result in results:
+            if result['status'] == 'ok':
+                print(f"{result['course'][:24]:<24} {'ok':<8} {result['students']:>9} "
+                      f"{result['mean_grade']:>7.2f} {result['elapsed_s']:>9.2f}")
+            else:
+                elapsed = '' if result['elapsed_s'] is None else f"{result['elapsed_s']:.2f}"
+                print(f"{result['course'][:24]:<24} {'failed':<8} {'':>9} {'':>7} {elapsed:>9}")
+        print(f"\nCourses: {len(results) - len(failed)} succeeded, {len(failed)} failed")
+        for result in failed:
+            print(f"  {result['course']}: {result['error']}")
+        print("="*60 + "\n")
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compute weighted final grades per group.")
+    parser.add_argument('--manifest', type=Path,
+                        help="JSON list of course directories to process concurrently")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for --manifest (default: CPU count)")
+    parser.add_argument('--output-dir', type=Path, default=Path("batch_output"),
+                        help="Directory for per-course logs and results (default: batch_output)")
+    args = parser.parse_args(argv)
+    
+    if args.manifest:
+        runner = CourseBatchRunner(CourseBatchRunner.load_manifest(args.manifest, args.output_dir),
+                                   args.output_dir, args.workers)
+        results = runner.run()
+        runner.print_summary(results)
+        return results
+    
     config = GradeConfig()
     processor = GradeProcessor(config)
     processor.process()
@@ -0,0 +1,341 @@
+import importlib.util
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+HERE = Path(__file__).resolve().parent
+
+# Loaded under its own name so this module can share a session with the raster tests, and
+# from a scratch directory because the script opens grade_processing.log in the cwd on import
+_spec = importlib.util.spec_from_file_location("grades_solution", HERE / "solution.py")
+solution = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = solution
+_cwd = os.getcwd()
+os.chdir(tempfile.mkdtemp(prefix="grades-log-"))
+try:
+    _spec.loader.exec_module(solution)
+finally:
+    os.chdir(_cwd)
+
+logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture(params=["clean", "messy", "numeric-ids"])
+def gradebook(request, tmp_path) -> Path:
+    """
+    The course's sample inputs, optionally with the problems real exports have.
+
+    The messy variant adds a duplicated quiz row, a quiz row for an unknown
+    student, an unconvertible grade and an out-of-range homework score. The
+    numeric-ids variant replaces every student's ID with a zero-padded number.
+    """
+    directory = tmp_path / "assets"
+    directory.mkdir()
+    for name in ("Homework_and_exams.csv", "quiz_1_grades.csv", "quiz_2_grades.csv"):
+        shutil.copy(HERE / "assets" / name, directory / name)
+    shutil.copy(HERE / "assets" / "Students.json", directory / "students.json")
+
+    if request.param == "messy":
+        homework = pd.read_csv(directory / "Homework_and_exams.csv", dtype=str)
+        homework.loc[3, "Homework 1"] = "250"
+        homework.loc[4, "Homework 2"] = "excused"
+        homework.to_csv(directory / "Homework_and_exams.csv", index=False)
+
+        quiz = pd.read_csv(directory / "quiz_1_grades.csv", dtype=str)
+        unknown = pd.DataFrame([{"Last Name": "Nobody", "First Name": "Ann", "Grade": "7",
+                                 "SID": "zz000001"}])
+        pd.concat([quiz, quiz.iloc[[0]], unknown]).to_csv(directory / "quiz_1_grades.csv",
+                                                          index=False)
+
+    if request.param == "numeric-ids":
+        records = json.loads(json.loads((directory / "students.json").read_text()))
+        numeric = {record["NetID"].lower(): f"{index:05d}" for index, record in enumerate(records)}
+        for record in records:
+            record["NetID"] = numeric[record["NetID"].lower()]
+        (directory / "students.json").write_text(json.dumps(json.dumps(records)))
+        for name in ("Homework_and_exams.csv", "quiz_1_grades.csv", "quiz_2_grades.csv"):
+            df = pd.read_csv(directory / name, dtype=str)
+            df["SID"] = df["SID"].map(lambda sid: numeric.get(sid.lower(), sid))
+            df.to_csv(directory / name, index=False)
+    return directory
+
+
+def config_for(directory: Path, tmp_path: Path, **overrides) -> "solution.GradeConfig":
+    return solution.GradeConfig(base_dir=directory, output_file=str(tmp_path / "grades.xlsx"),
+                                **overrides)
+
+
+def final_grades(config: "solution.GradeConfig") -> pd.DataFrame:
+    processor = solution.GradeProcessor(config)
+    merged = processor.merge_data_efficiently(*processor.load_and_prepare_data())
+    return processor.calculate_final_grades(merged)
+
+
+def test_coded_join_matches_pandas_merge(gradebook, tmp_path):
+    frames = {}
+    for engine in ("coded", "pandas"):
+        processor = solution.GradeProcessor(config_for(gradebook, tmp_path, join_engine=engine))
+        frames[engine] = processor.merge_data_efficiently(*processor.load_and_prepare_data())
+    pd.testing.assert_frame_equal(frames["coded"], frames["pandas"])
+
+
+@pytest.mark.parametrize("chunk_rows", [7, 100_000])
+def test_streaming_matches_eager_loading(gradebook, tmp_path, chunk_rows):
+    expected = final_grades(config_for(gradebook, tmp_path))
+    streamed = final_grades(config_for(gradebook, tmp_path, streaming=True, chunk_rows=chunk_rows))
+    pd.testing.assert_frame_equal(streamed, expected)
+
+
+def test_pyarrow_reader_matches_c_reader(gradebook, tmp_path):
+    pytest.importorskip("pyarrow")
+    config = config_for(gradebook, tmp_path, streaming=True, chunk_rows=7)
+    expected = final_grades(config)
+    result = final_grades(replace(config, csv_engine="pyarrow"))
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_input_cache_hit_matches_fresh_run(gradebook, tmp_path, monkeypatch):
+    config = config_for(gradebook, tmp_path, cache_dir=tmp_path / "cache")
+    fresh = solution.GradeProcessor(config)
+    fresh_frames = fresh.load_and_prepare_data()
+
+    logged = []
+    monkeypatch.setattr(solution.ValidationEngine, "log_report",
+                        staticmethod(lambda report, labels=None: logged.append(report)))
+    cached = solution.GradeProcessor(config)
+    cached_frames = cached.load_and_prepare_data()
+
+    assert 'cache' in cached.instrumentation.stages and 'load' not in cached.instrumentation.stages
+    for before, after in zip(fresh_frames, cached_frames):
+        pd.testing.assert_frame_equal(after, before)
+    assert cached.validation_report == fresh.validation_report
+    assert logged == list(fresh.validation_report.values())
+
+    stricter = solution.GradeProcessor(replace(config, homework_max=50))
+    stricter.load_and_prepare_data()
+    assert 'load' in stricter.instrumentation.stages
+    ranges = [entry['range'] for entry in
+              stricter.validation_report["Homework_and_exams.csv"]['columns'].values()]
+    assert [0, 50] in ranges
+
+
+def test_incremental_run_matches_full_run(gradebook, tmp_path):
+    config = config_for(gradebook, tmp_path, export_format="csv",
+                        state_file=tmp_path / "state.parquet")
+    solution.GradeProcessor(config).process()
+
+    homework = pd.read_csv(gradebook / "Homework_and_exams.csv", dtype=str)
+    homework.loc[10, "Exam"] = "12"
+    homework.to_csv(gradebook / "Homework_and_exams.csv", index=False)
+
+    processor = solution.GradeProcessor(config)
+    incremental = processor.process()
+    full_config = replace(config, state_file=None, output_file=str(tmp_path / "full.xlsx"))
+    full = solution.GradeProcessor(full_config).process()
+
+    pd.testing.assert_frame_equal(incremental, full)
+    assert 0 < processor.instrumentation.stages['export']['rows_out'] < len(full)
+    exported = sorted(path.name for path in (tmp_path / "grades").iterdir())
+    assert exported == sorted(path.name for path in (tmp_path / "full").iterdir())
+    for name in exported:
+        pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "grades" / name),
+                                      pd.read_csv(tmp_path / "full" / name))
+
+
+def test_weight_scenarios_match_pipeline_runs(gradebook, tmp_path):
+    config = config_for(gradebook, tmp_path)
+    scenarios = {
+        "exam-heavy": replace(config, weight_homework=0.05, weight_quiz=0.15, weight_exam=0.80),
+        "quiz-out-of-20": replace(config, quiz_max=20),
+    }
+    result = solution.WeightScenarios(final_grades(config), config).evaluate(scenarios)
+    for name, scenario in scenarios.items():
+        expected = final_grades(scenario)["FinalGrade"].to_numpy(dtype=np.float64, na_value=np.nan)
+        np.testing.assert_allclose(result.grades[name].to_numpy(), expected, rtol=1e-12)
+
+
+def test_course_batch_isolates_failures(gradebook, tmp_path):
+    for name in ("workbook", "missing", "csv"):
+        (tmp_path / name).mkdir()
+    courses = {
+        "workbook": config_for(gradebook, tmp_path / "workbook"),
+        "missing": config_for(tmp_path / "no-such-course", tmp_path / "missing"),
+        "csv": config_for(gradebook, tmp_path / "csv", export_format="csv"),
+    }
+    results = solution.CourseBatchRunner(courses, tmp_path / "batch", workers=2).run()
+
+    assert [result['course'] for result in results] == list(courses)
+    assert [result['status'] for result in results] == ["ok", "failed", "ok"]
+    assert results[1]['error'].startswith("FileNotFoundError") and results[1]['output'] is None
+    assert results[0]['output'] == str(tmp_path / "workbook" / "grades.xlsx")
+    assert results[2]['output'] == str(tmp_path / "csv" / "grades")
+    for result in (results[0], results[2]):
+        expected = final_grades(courses[result['course']])
+        assert Path(result['output']).exists()
+        assert result['students'] == len(expected)
+        assert result['mean_grade'] == pytest.approx(expected["FinalGrade"].mean())
+    assert json.loads((tmp_path / "batch" / "batch_summary.json").read_text()) == results
+
+
+def test_validation_report_counts_each_rule():
+    df = pd.DataFrame({"SID": ["a", "b", "c", "b", "d", "a"],
+                       "HW": ["10", None, "x", "150", "-1", "90"],
+                       "Exam": [1, 2, 3, 4, 5, None]})
+    report = solution.ValidationEngine(sample_size=1).validate(
+        df, "SID", ["HW", "Exam"], {"HW": (0, 100)})
+
+    assert report == {
+        'rows': 6, 'id_column': "SID",
+        'columns': {
+            "HW": {'range': [0, 100],
+                   'nulls': {'count': 2, 'sample_ids': ["b"]},
+                   'failed_conversion': {'count': 1, 'sample_ids': ["c"]},
+                   'out_of_range': {'count': 2, 'sample_ids': ["b"], 'sample_values': [150.0]}},
+            "Exam": {'range': None,
+                     'nulls': {'count': 1, 'sample_ids': ["a"]},
+                     'failed_conversion': {'count': 0, 'sample_ids': []},
+                     'out_of_range': {'count': 0, 'sample_ids': [], 'sample_values': []}},
+        },
+        'duplicates': {'column': "SID", 'count': 2, 'sample_ids': ["b"]},
+    }
+    assert df["HW"].tolist()[3:] == [150.0, -1.0, 90.0]
+
+
+def test_validation_report_matches_per_column_checks():
+    rng = np.random.default_rng(6)
+    n, columns = 500, ["A", "B", "C"]
+    df = pd.DataFrame({"SID": rng.integers(0, 400, n).astype(str)})
+    for col in columns:
+        values = rng.integers(-20, 130, n).astype(str).astype(object)
+        values[rng.random(n) < 0.05] = None
+        values[rng.random(n) < 0.05] = "n/a"
+        df[col] = values
+    ranges = {"A": (0, 100), "C": (0, 10)}
+    raw = df.copy()
+
+    engine = solution.ValidationEngine(sample_size=3)
+    report = engine.validate(df, "SID", columns, ranges)
+    blocks = [raw.iloc[start:start + 64].copy() for start in range(0, n, 64)]
+    merged = engine.merge([engine.validate(block, "SID", columns, ranges, duplicates=False)
+                           for block in blocks])
+    assert merged['columns'] == report['columns']
+
+    for col in columns:
+        numeric = pd.to_numeric(raw[col], errors='coerce')
+        low, high = ranges.get(col, (-np.inf, np.inf))
+        expected = {
+            'nulls': numeric.isna(),
+            'failed_conversion': numeric.isna() & raw[col].notna(),
+            'out_of_range': (numeric < low) | (numeric > high),
+        }
+        for rule, mask in expected.items():
+            entry = report['columns'][col][rule]
+            assert entry['count'] == mask.sum()
+            assert entry['sample_ids'] == raw["SID"][mask].head(3).tolist()
+    duplicated = raw["SID"].duplicated()
+    assert report['duplicates']['count'] == duplicated.sum()
+    assert report['duplicates']['sample_ids'] == raw["SID"][duplicated].head(3).tolist()
+
+
+@pytest.mark.parametrize("gradebook", ["messy"], indirect=True)
+@pytest.mark.parametrize("streaming", [False, True])
+def test_validation_report_flags_messy_rows(gradebook, tmp_path, streaming):
+    processor = solution.GradeProcessor(config_for(gradebook, tmp_path, streaming=streaming,
+                                                   chunk_rows=7))
+    processor.load_and_prepare_data()
+    homework = pd.read_csv(gradebook / "Homework_and_exams.csv", dtype=str)
+    quiz = pd.read_csv(gradebook / "quiz_1_grades.csv", dtype=str)
+
+    columns = processor.validation_report["Homework_and_exams.csv"]['columns']
+    assert columns["Homework 1"]['out_of_range'] == {
+        'count': 1, 'sample_ids': [homework.loc[3, "SID"].lower()], 'sample_values': [250]}
+    assert columns["Homework 2"]['failed_conversion'] == {
+        'count': 1, 'sample_ids': [homework.loc[4, "SID"].lower()]}
+    duplicates = processor.validation_report["quiz_1_grades.csv"]['duplicates']
+    assert duplicates['count'] == 1 and duplicates['sample_ids'] == [quiz.loc[0, "SID"].lower()]
+
+
+def dataframe_of_records(records: list) -> pd.DataFrame:
+    """``pd.DataFrame(records)`` with repetitive text columns categorized, as the roster promises."""
+    df = pd.DataFrame(records)
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        if df[col].nunique() / len(df) < solution.StudentRoster.CATEGORY_RATIO:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def random_roster(rng: random.Random, n: int, variant: int) -> list:
+    names = ['Ann "Q"', "B\\ob", "Çé", "😀 x", "line\nbreak", "}{", "tab\t", "plain"]
+    records = []
+    for i in range(n):
+        record = {"ID": i, "Name": rng.choice(names) + str(i if rng.random() < 0.7 else 0),
+                  "NetID": f"id{i}", "Group": rng.randint(1, 4)}
+        if variant == 1:
+            record["Major"] = rng.choice(["GIS", "RS", None])
+        if variant == 2 and rng.random() < 0.1:
+            del record["Group"]
+        if variant == 3 and i > n // 2:
+            record["Late"] = rng.choice(["a", "b"])
+        records.append(record)
+    return records
+
+
+@pytest.mark.parametrize("block_chars", [1, 7, 64, 1 << 20])
+def test_roster_matches_dataframe_of_records(tmp_path, monkeypatch, block_chars):
+    monkeypatch.setattr(solution.StudentRoster, "BLOCK_CHARS", block_chars)
+    rng = random.Random(block_chars)
+    path = tmp_path / "students.json"
+    for trial in range(40):
+        records = random_roster(rng, rng.choice([1, 2, 5, 50, 300]), trial % 4)
+        path.write_text(json.dumps(json.dumps(records, ensure_ascii=rng.random() < 0.5)))
+        pd.testing.assert_frame_equal(solution.StudentRoster.read(path),
+                                      dataframe_of_records(records))
+
+
+def test_roster_matches_sample_students(gradebook):
+    records = json.loads(json.loads((gradebook / "students.json").read_text()))
+    pd.testing.assert_frame_equal(solution.StudentRoster.read(gradebook / "students.json"),
+                                  dataframe_of_records(records))
+
+
+@pytest.mark.parametrize("trace_memory", [False, True])
+def test_run_report_totals_hooked_stage_records(gradebook, tmp_path, trace_memory):
+    records = []
+    config = config_for(gradebook, tmp_path, streaming=True, chunk_rows=7,
+                        trace_memory=trace_memory, run_report=tmp_path / "run.json")
+    final_df = solution.GradeProcessor(
+        config, stage_hook=lambda name, record: records.append((name, dict(record)))).process()
+    report = json.loads((tmp_path / "run.json").read_text())
+
+    assert report['status'] == "completed"
+    assert {"load", "normalize", "merge", "compute", "export"} <= set(report['stages'])
+    for name, total in report['stages'].items():
+        calls = [record for stage, record in records if stage == name]
+        assert total['calls'] == len(calls) > 0
+        for key in ("rows_in", "rows_out", "wall_s", "cpu_s"):
+            assert total[key] == pytest.approx(sum(record[key] for record in calls))
+        if trace_memory:
+            assert total['peak_mb'] == pytest.approx(max(record['peak_mb'] for record in calls))
+        else:
+            assert 'peak_mb' not in total
+    assert report['stages']["load"]['calls'] > 4  # one per CSV chunk
+    assert report['stages']["compute"]['rows_out'] == len(final_df)
+    assert report['stages']["export"]['rows_out'] == len(final_df)
+    assert (report['peak_mb'] > 0) if trace_memory else report['peak_mb'] is None
+
+
+def test_run_report_records_failed_runs(tmp_path):
+    config = config_for(tmp_path / "no-such-course", tmp_path, run_report=tmp_path / "run.json")
+    with pytest.raises(FileNotFoundError):
+        solution.GradeProcessor(config).process()
+    assert json.loads((tmp_path / "run.json").read_text())['status'] == "failed"